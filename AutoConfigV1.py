@@ -1,9 +1,9 @@
-# Declares File Variables
-file_name = input("Enter File Name: ")
-old_config_file = open(file_name, "r")
-old_config_txt = old_config_file.readlines()
+from autoconfig.descriptions import LEGACY_RULES, Description_Filter
 
-new_config_file = open("New_Config.txt", "w")
+# Declares File Variables, opened by main() so importing the module has no effects
+old_config_file = None
+new_config_file = None
+description_filter = Description_Filter(LEGACY_RULES)
 
 
 class Port:
@@ -11,12 +11,8 @@ class Port:
         self, location: str, vlan_access: str = None, vlan_description: str = None
     ):
         self.location = location
-        self.vlan_description = vlan_description
+        self.vlan_description = description_filter.apply(vlan_description)
         self.vlan_access = vlan_access
-        if self.vlan_description is not None:
-            temp = self.vlan_description.lower()
-            if "ruckus" in temp or "ap" in temp:
-                self.vlan_description = None
         self.simple_location = self.simplify_location()
 
     def simplify_location(self):
@@ -128,7 +124,7 @@ def get_stack() -> Port_Group:
     vlan = None
     vlan_description = None
     hostname = None
-    for line in old_config_txt:
+    for line in old_config_file:  # Streams the file instead of reading every line
         if "vlan" in line:
             if line.index("vlan") == 0:
                 vlan = line[5 : line.index("\n")]
@@ -200,8 +196,7 @@ def get_stack() -> Port_Group:
 
 
 def get_grouped_port_table(sort_by: str, stack: Port_Group):
-    key_table = []
-    port_group_table = []
+    port_group_table = {}
     sorting_key = None
     vlan_access = None
     vlan_description = None
@@ -216,16 +211,11 @@ def get_grouped_port_table(sort_by: str, stack: Port_Group):
 
         if sorting_key is None:
             continue
-        elif sorting_key not in key_table:
+        elif sorting_key not in port_group_table:
             group = Port_Group(vlan_access, vlan_description)
-            group.add_port(port)
-            port_group_table.append(group)
-            key_table.append(sorting_key)
-        else:
-            for group in port_group_table:
-                if group.get_key() == sorting_key:
-                    group.add_port(port)
-    return port_group_table
+            port_group_table[sorting_key] = group
+        port_group_table[sorting_key].add_port(port)
+    return list(port_group_table.values())
 
 
 def get_vlan_access_prompt(group):
@@ -298,4 +288,13 @@ def get_interface(group: Port_Group):
     return interface_prompt
 
 
-configure_stack()
+def main():
+    global old_config_file, new_config_file
+    file_name = input("Enter File Name: ")
+    old_config_file = open(file_name, "r")
+    new_config_file = open("New_Config.txt", "w")
+    configure_stack()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,38 @@
-# Declares File Variables
-old_config_file = open("Old_Config.txt", "r")
-new_config_file = open("New_Config.txt", "w")
+from autoconfig.descriptions import LEGACY_RULES, Description_Filter
+from autoconfig.policy import Policy
+
+# Declares File Variables, opened by main() so importing the module has no effects
+old_config_file = None
+new_config_file = None
+legacy_filter = Description_Filter(LEGACY_RULES)
 
 class Port:
-    def __init__(self, location: str, vlan_access: str, description: str):
+    def __init__(self, location: str, vlan_access: str, description: str, description_filter = legacy_filter):
         self.location = location
         self.coordinates = self.set_coordinates(self.location)
+        self.switch = None
         self.vlan_access = vlan_access
-        self.description = description
-        if self.description is None:
-            return
-        elif "ap" in self.description.lower() or "ruckus" in self.description.lower():
-            self.description = None
+        self.description = description_filter.apply(description)
     def set_coordinates(self, location: str) -> tuple:
         switch_coordinate = int(location[0:location.index("/1/")])
         port_coordinate = int(location[location.index("/1/") + 3:])
         return (switch_coordinate, port_coordinate)
+    # Reads the member number from the switch at render time, so remapping a switch
+    # never touches its ports
     def get_location(self) -> str:
-        return self.location
+        if self.switch is None:
+            return self.location
+        return str(self.switch.vsf_member) + self.location[self.location.index("/"):]
+    def get_locations(self) -> list:
+        return [self.get_location()]
+    def get_end_location(self) -> str:
+        return self.get_location()
     def get_coordinates(self) -> tuple:
         return self.coordinates
+    def get_end_coordinates(self) -> tuple:
+        return self.coordinates
+    def get_size(self) -> int:
+        return 1
     def get_vlan_access(self):
         return self.vlan_access
     def get_description(self):
@@ -28,6 +41,37 @@ class Port:
         self.location = str(new_switch) + self.location[self.location.index("/"):]
         return self
 
+# Stands in for a run of unconfigured ports, e.g. switch 3 ports 17 to 48, so
+# padding and new members never create a Port per location
+class Port_Range:
+    def __init__(self, switch_number: int, first: int, last: int):
+        self.coordinates = (switch_number, first)
+        self.end_coordinates = (switch_number, last)
+        self.switch = None
+    def get_switch_number(self) -> int:
+        if self.switch is None:
+            return self.coordinates[0]
+        return self.switch.vsf_member
+    def get_location(self) -> str:
+        return f"{self.get_switch_number()}/1/{self.coordinates[1]}"
+    def get_locations(self) -> list:
+        switch_number = self.get_switch_number()
+        first = self.coordinates[1]
+        last = self.end_coordinates[1]
+        return [f"{switch_number}/1/{i}" for i in range(first, last + 1)]
+    def get_end_location(self) -> str:
+        return f"{self.get_switch_number()}/1/{self.end_coordinates[1]}"
+    def get_coordinates(self) -> tuple:
+        return self.coordinates
+    def get_end_coordinates(self) -> tuple:
+        return self.end_coordinates
+    def get_size(self) -> int:
+        return self.end_coordinates[1] - self.coordinates[1] + 1
+    def get_vlan_access(self):
+        return None
+    def get_description(self):
+        return None
+
 class Port_Group:
     def __init__(self, vlan_access: int, description: str):
         self.vlan_access = vlan_access
@@ -70,13 +114,14 @@ class Port_Group:
         interface_prompt = "interface "
         interface_ranges = self.get_interface_ranges()
         for interface_range in interface_ranges:
-            range_length = len(interface_range)
+            range_length = sum(port.get_size() for port in interface_range)
             if range_length <= 2:
                 for port in interface_range:
-                    interface_prompt += f"{port.get_location()},"
+                    for location in port.get_locations():
+                        interface_prompt += f"{location},"
             else:
                 start = interface_range[0].get_location()
-                end = interface_range[-1].get_location()
+                end = interface_range[-1].get_end_location()
                 interface_prompt += f"{start}-{end},"
         interface_prompt = f"{interface_prompt[0:-1]}\n"
         return interface_prompt
@@ -90,7 +135,7 @@ class Port_Group:
                 last_port = port
                 current_range = [last_port]
                 continue
-            last_port_coordinates = last_port.get_coordinates()
+            last_port_coordinates = last_port.get_end_coordinates()
             current_port_coordinates = port.get_coordinates()
             on_same_switch = last_port_coordinates[0] == current_port_coordinates[0]
             in_sequence = on_same_switch and last_port_coordinates[1] + 1 == current_port_coordinates[1]
@@ -124,21 +169,31 @@ class Switch(Port_Group):
         super().__init__(None, None)
     def get_vsf_member(self):
         return self.vsf_member
+    def add_port(self, port):
+        port.switch = self
+        return super().add_port(port)
     def remap(self, new_switch: int):
         self.vsf_member = new_switch
-        for port in self.port_list:
-            port.remap(new_switch)
         return self
 
 
 class Stack:
-    def __init__(self, hostname: str, ip_address: str, switch_list: list, groups: Port_Group, remap = False):
-        self.num_48_port_switches = int(input("Number of 48 Port Switches: "))
-        self.has_24_port_switch = input("Stack Has 24 Port Switch? (Y/N): ").lower() == "y"
+    def __init__(self, hostname: str, ip_address: str, switch_list: list, groups: Port_Group, remap = False, answers = None):
+        self.answers = answers
+        if answers is None:
+            self.num_48_port_switches = int(input("Number of 48 Port Switches: "))
+            self.has_24_port_switch = input("Stack Has 24 Port Switch? (Y/N): ").lower() == "y"
+        else:
+            self.num_48_port_switches = answers.switch_count or switch_list[-1].get_vsf_member()
+            self.has_24_port_switch = answers.has_24_port
         self.hostname = hostname
         self.ip_address = ip_address
         self.switch_list = switch_list
         self.groups = groups
+        if answers is not None:
+            if answers.secondary_member is not None:
+                new_config_file.write(f"vsf secondary {answers.secondary_member}\n\n")
+            return
         if self.num_48_port_switches < 3 and not self.has_24_port_switch or self.num_48_port_switches == 1:
             return
         configure_secondary = input("Configure Last Switch as Secondary? (Y/N): ").lower() == "y"
@@ -149,6 +204,12 @@ class Stack:
         else:
             new_config_file.write(f"vsf secondary {self.num_48_port_switches}\n\n")
     def configure(self, remap = False):
+        self.configure_new(remap)
+        self.stack_groups = self.trace_stack()
+        self.write_configuration()
+
+    # Writes the configuration of the groups traced by configure
+    def write_configuration(self):
         prompts = []
         hostname_prompt = self.get_hostname_prompt()
         prompts.append(hostname_prompt + "\n")
@@ -159,9 +220,7 @@ class Stack:
         ip_route_prompt = self.get_ip_route_prompts()
         prompts.append(ip_route_prompt)
         prompts.append("\n")
-        self.configure_new(remap)
-        stack_groups = self.trace_stack()
-        for i in stack_groups:
+        for i in self.stack_groups:
             for group in i:
                 for prompt in group.configure():
                     prompts.append(prompt)
@@ -169,6 +228,8 @@ class Stack:
         prompts.append("write memory\n\n")
         new_config_file.writelines(prompts)
 
+    # Renumbers the members without padding or grouping again: ports read their
+    # member from their switch, and every group only reorders its ports by member
     def remap(self, new_order: tuple):
         c = 1
         temp_switch_list = []
@@ -178,7 +239,10 @@ class Stack:
             c += 1
         self.switch_list = temp_switch_list
         self.num_48_port_switches = len(self.switch_list)
-        self.configure(True)
+        for groups in self.stack_groups:
+            for group in groups:
+                group.port_list.sort(key=lambda port: port.switch.vsf_member)
+        self.write_configuration()
 
     def get_hostname_prompt(self):
         return f"hostname {self.hostname}\n"
@@ -202,10 +266,8 @@ class Stack:
         return f"ip route 0.0.0.0/0 {octets[0]}.{octets[1]}.0.1\n"
     
     def trace_stack(self):
-        vlan_access_ports = []
-        vlan_access_list = []
-        description_ports = []
-        description_list = []
+        vlan_access_ports = {}
+        description_ports = {}
         all_ports = [Port_Group(None, None)]
         for switch in self.switch_list:
             for port in switch.get_port_list():
@@ -213,57 +275,47 @@ class Stack:
                 vlan = port.get_vlan_access()
                 description = port.get_description()
                 if vlan is not None:
-                    if vlan in vlan_access_list:
-                        index = vlan_access_list.index(vlan)
-                        vlan_access_ports[index].add_port(port)
-                    else:
-                        vlan_access_list.append(vlan)
-                        group = Port_Group(vlan, None)
-                        group.add_port(port)
-                        vlan_access_ports.append(group)
+                    if vlan not in vlan_access_ports:
+                        vlan_access_ports[vlan] = Port_Group(vlan, None)
+                    vlan_access_ports[vlan].add_port(port)
                 if description is not None:
-                    if description in description_list:
-                        index = description_list.index(description)
-                        description_ports[index].add_port(port)
-                    else:
-                        description_list.append(description)
-                        group = Port_Group(None, description)
-                        group.add_port(port)
-                        description_ports.append(group)
-        return (all_ports, vlan_access_ports, description_ports)
+                    if description not in description_ports:
+                        description_ports[description] = Port_Group(None, description)
+                    description_ports[description].add_port(port)
+        return (all_ports, list(vlan_access_ports.values()), list(description_ports.values()))
 
     def configure_new(self, remap = False):
         old_config_end_port = self.switch_list[-1].get_port_list()[-1]
-        switch_number, port_number = old_config_end_port.get_coordinates()
+        switch_number, port_number = old_config_end_port.get_end_coordinates()
         delta = self.num_48_port_switches - switch_number
         if delta < 0 and not remap:
             raise Exception("Switch Loss Detected")
         elif delta > 0:
             print("*Excess Switches Detected*")
-            input(f"*Recommended Number of 48 Port Switches: {self.num_48_port_switches - delta}*")
+            recommendation = f"*Recommended Number of 48 Port Switches: {self.num_48_port_switches - delta}*"
+            if self.answers is None:
+                input(recommendation)
+            else:
+                print(recommendation)
 
         if port_number != 48:
-            for i in range(port_number + 1, 49):
-                location = f"{switch_number}/1/{i}"
-                port = Port(location, None, None)
-                self.switch_list[-1].add_port(port)
+            self.switch_list[-1].add_port(Port_Range(switch_number, port_number + 1, 48))
         for i in range(switch_number + 1, self.num_48_port_switches + 1):
             self.switch_list.append(Switch(i))
-            for k in range(1, 49):
-                location = f"{i}/1/{k}"
-                port = Port(location, None, None)
-                self.switch_list[-1].add_port(port)
+            self.switch_list[-1].add_port(Port_Range(i, 1, 48))
         if self.has_24_port_switch:
             self.switch_list.append(Switch(self.num_48_port_switches + 1))
-            for i in range(1, 25):
-                location = f"{self.num_48_port_switches + 1}/1/{i}"
-                port = Port(location, None, None)
-                self.switch_list[-1].add_port(port)
+            self.switch_list[-1].add_port(Port_Range(self.num_48_port_switches + 1, 1, 24))
 
 class Config_Tracer:
-    def __init__(self, old_config_file, new_config_file):
-        self.old_config = old_config_file.readlines()
+    def __init__(self, old_config_file, new_config_file, policy = None):
+        # Lines are read lazily while tracing instead of loading the whole file
+        self.old_config = old_config_file
         self.new_config_file = new_config_file
+        self.policy = policy
+        self.description_filter = legacy_filter
+        if policy is not None and policy.description_filter is not None:
+            self.description_filter = policy.description_filter
     def trace(self, remap = False):
         ports = Port_Group(None, None)
         current_switch = 1
@@ -292,7 +344,7 @@ class Config_Tracer:
             elif "description" in line and location is not None:
                 description = line[13:-1]
             elif "#" in line and location is not None:
-                port = Port(location, vlan_access, description)
+                port = Port(location, vlan_access, description, self.description_filter)
                 if port.coordinates[0] == current_switch:
                     switch_list[current_switch - 1].add_port(port)
                 else:
@@ -306,30 +358,46 @@ class Config_Tracer:
                 description = None
         prompts = []
         groups = vlan_access_ports + description_ports
-        stack = Stack(hostname, ip_address, switch_list, groups, remap)
+        answers = None
+        if self.policy is not None:
+            answers = self.policy.for_hostname(hostname)
+        stack = Stack(hostname, ip_address, switch_list, groups, remap, answers)
         stack.configure()
         return stack
 
 
-prompt = ""
-while prompt != "q":
-    prompt = input(":")
-    old_config_file = open("Old_Config.txt", "r")
-    new_config_file = open("New_Config.txt", "w")
-    if "configure" in prompt:
-        new_config_file = open("New_Config.txt", "w")
-        config_tracer = Config_Tracer(old_config_file, new_config_file)
-        config_tracer.trace()
-        print("*New Configuration Generated Successfully*")
-    elif "remap" in prompt:
-        config_tracer = Config_Tracer(old_config_file, new_config_file)
-        stack = config_tracer.trace(True)
+def main():
+    global old_config_file, new_config_file
+    prompt = ""
+    policy = None
+    while prompt != "q":
+        prompt = input(":")
+        old_config_file = open("Old_Config.txt", "r")
         new_config_file = open("New_Config.txt", "w")
-        remap = input("Enter Remapped Order: ")
-        remap_list = []
-        for i in remap.strip():
-            if i != ",":
-                remap_list.append(int(i))
-        stack.remap(remap_list)
-    old_config_file.close()
-    new_config_file.close()
+        if "policy" in prompt:
+            policy = Policy.load(prompt[7:].strip())
+            print("*Policy Loaded, Prompts Disabled*")
+        elif "configure" in prompt:
+            new_config_file = open("New_Config.txt", "w")
+            config_tracer = Config_Tracer(old_config_file, new_config_file, policy)
+            config_tracer.trace()
+            print("*New Configuration Generated Successfully*")
+        elif "remap" in prompt:
+            config_tracer = Config_Tracer(old_config_file, new_config_file, policy)
+            stack = config_tracer.trace(True)
+            new_config_file = open("New_Config.txt", "w")
+            if stack.answers is not None and stack.answers.remap is not None:
+                remap_list = stack.answers.remap
+            else:
+                remap = input("Enter Remapped Order: ")
+                remap_list = []
+                for i in remap.strip():
+                    if i != ",":
+                        remap_list.append(int(i))
+            stack.remap(remap_list)
+        old_config_file.close()
+        new_config_file.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import importlib
+
+# Public names are looked up in their module on first use, so "import autoconfig"
+# loads nothing else and a worker only pays for the modules it touches
+EXPORTS = {
+    "Policy": "autoconfig.policy",
+    "Description_Filter": "autoconfig.descriptions",
+    "Parse_Cache": "autoconfig.cache",
+    "STATS": "autoconfig.stats",
+    "Stats": "autoconfig.stats",
+    "Port_Table": "autoconfig.translator",
+    "Stack": "autoconfig.translator",
+    "Translator": "autoconfig.translator",
+    "batch_translate": "autoconfig.batch",
+    "pipeline_translate": "autoconfig.pipeline",
+    "write_configuration": "autoconfig.translator",
+    "Translation_Server": "autoconfig.server",
+    "generate_delta": "autoconfig.delta",
+    "parse_running_config": "autoconfig.delta",
+    "Port_Database": "autoconfig.port_database",
+    "Collector": "autoconfig.collector",
+    "collect_configs": "autoconfig.collector",
+    "Fake_Comware_Server": "autoconfig.fake_devices",
+    "Push_Engine": "autoconfig.push",
+    "push_configs": "autoconfig.push",
+    "Fake_AOSCX_Server": "autoconfig.fake_devices",
+    "check_devices": "autoconfig.preflight",
+}
+
+
+def __getattr__(name: str):
+    module = EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'autoconfig' has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + list(EXPORTS))
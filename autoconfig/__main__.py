@@ -0,0 +1,5 @@
+import sys
+
+from autoconfig.cli import main
+
+sys.exit(main())
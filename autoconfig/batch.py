@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+
+from autoconfig import descriptions as descriptions_module
+from autoconfig import packing as packing_module
+from autoconfig import policy as policy_module
+from autoconfig import translator as translator_module
+from autoconfig.cache import Parse_Cache
+from autoconfig.packing import CACHE_FORMAT, pack_stack, unpack_stack
+from autoconfig.policy import Policy
+from autoconfig.stats import STATS, Stats
+from autoconfig.translator import Translator, find_configs, write_configuration
+
+# Translates whole directories of configs across a process pool, with the parse
+# cache and the port database as options. Kept apart from the translator so that
+# translating one file never loads the pool, cache or hashing machinery
+
+
+# Returns the cache fingerprint of the translator modules and a policy
+def get_fingerprint(policy: Policy) -> str:
+    digest = hashlib.sha256(str(CACHE_FORMAT).encode())
+    module_files = (
+        __file__,
+        translator_module.__file__,
+        packing_module.__file__,
+        policy_module.__file__,
+        descriptions_module.__file__,
+    )
+    for module_file in module_files:
+        with open(module_file, "rb") as source_file:
+            digest.update(source_file.read())
+    digest.update(policy.fingerprint().encode())
+    return digest.hexdigest()
+
+
+# Tests if an output file already holds a configuration with this hash
+def output_matches(config_name: str, config_hash: str) -> bool:
+    try:
+        with open(config_name, "r") as config_file:
+            existing_hash = hashlib.sha256(config_file.read().encode()).hexdigest()
+    except FileNotFoundError:
+        return False
+    return existing_hash == config_hash
+
+
+# Translates one file inside a batch worker and returns its hostnames, port count,
+# whether it was translated, rendered from the cache or left unchanged, and the
+# stats of every device
+def translate_file(
+    file_name: str,
+    output_directory: str,
+    policy: Policy,
+    cache: Parse_Cache = None,
+    records: bool = False,
+) -> tuple:
+    if cache is not None:
+        key = cache.key(file_name)
+        data = cache.load(key)
+        if data is not None:
+            return write_cached_stacks(data, output_directory, records)
+    hostnames = []
+    stack_records = []
+    port_count = 0
+    device_stats = []
+    packed_stacks = []
+    config_hashes = []
+    lines = []
+    sizes = []
+    with open(file_name, "r") as old_config_file:
+        for stack in Translator(policy).iter_stacks(old_config_file):
+            if cache is not None:
+                packed_stacks.append(pack_stack(stack))
+            config_name = os.path.join(output_directory, f"{stack.hostname}.txt")
+            digest = hashlib.sha256()
+            sizes.append(write_configuration(stack, config_name, digest))
+            device_stats.append(stack.stats.as_dict())
+            hostnames.append(stack.hostname)
+            config_hashes.append(digest.hexdigest())
+            lines.append(stack.stats.lines)
+            port_count += stack.stats.ports
+            if records:
+                stack_records.append(stack.get_record())
+    if not hostnames:
+        raise ValueError(f"No device configuration found in {file_name}")
+    if cache is not None:
+        trailer = [hostnames, config_hashes, port_count, lines, sizes]
+        trailer = json.dumps(trailer).encode()
+        entry = struct.pack("<HI", CACHE_FORMAT, len(trailer)) + trailer
+        cache.store(key, zlib.compress(entry + b"".join(packed_stacks)))
+    return (hostnames, port_count, "translated", device_stats, stack_records)
+
+
+# Rewrites the outputs of a cache entry, skipping every output that is unchanged.
+# Stats keep the source lines and output size of every device, written or not
+def write_cached_stacks(
+    data: bytes, output_directory: str, records: bool = False
+) -> tuple:
+    data = zlib.decompress(data)
+    _, trailer_length = struct.unpack_from("<HI", data)
+    offset = 6 + trailer_length
+    hostnames, config_hashes, port_count, lines, sizes = json.loads(data[6:offset])
+    status = "unchanged"
+    device_stats = []
+    stack_records = []
+    for hostname, config_hash, line_count, size in zip(
+        hostnames, config_hashes, lines, sizes
+    ):
+        stack, offset = unpack_stack(data, offset)
+        config_name = os.path.join(output_directory, f"{hostname}.txt")
+        if not output_matches(config_name, config_hash):
+            write_configuration(stack, config_name)
+            status = "cached"
+        stack.stats.lines = line_count
+        stack.stats.bytes = size
+        stack.stats.ports = stack.get_port_count()
+        device_stats.append(stack.stats.as_dict())
+        if records:
+            stack_records.append(stack.get_record())
+    return (hostnames, port_count, status, device_stats, stack_records)
+
+
+# Translates every config in a directory or glob across a process pool
+def batch_translate(
+    source: str,
+    output_directory: str = ".",
+    policy: Policy = None,
+    workers: int = None,
+    cache_directory: str = None,
+    database_name: str = None,
+    profile: tuple = None,
+):
+    # Imported here so that importing this module never loads the pool machinery
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    policy = policy or Policy()
+    file_names = find_configs(source)
+    os.makedirs(output_directory, exist_ok=True)
+    cache = None
+    if cache_directory is not None:
+        cache = Parse_Cache(cache_directory, get_fingerprint(policy))
+    database = None
+    if database_name is not None:
+        import sqlite3
+
+        from autoconfig.port_database import Port_Database
+
+        database = Port_Database(database_name)
+    records = database is not None
+    # (mode, prefix): every worker profiles its files into a shared directory
+    if profile is not None:
+        import tempfile
+
+        from autoconfig.profiling import merge_worker_profiles, profile_in_worker
+
+        profile_mode, profile_prefix = profile
+        profile_directory = tempfile.mkdtemp(prefix="autoconfig-profile-")
+    results = []
+    statuses = {"translated": 0, "cached": 0, "unchanged": 0}
+    batch_stats = Stats()
+    devices = []
+    device_total = 0
+    port_total = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for file_name in file_names:
+            arguments = (translate_file, file_name, output_directory, policy, cache)
+            if profile is None:
+                future = executor.submit(*arguments, records)
+            else:
+                future = executor.submit(
+                    profile_in_worker,
+                    profile_mode,
+                    profile_directory,
+                    *arguments,
+                    records,
+                )
+            futures[future] = file_name
+        for future in as_completed(futures):
+            file_name = futures[future]
+            try:
+                result = future.result()
+            except Exception as error:
+                print(f"*Failed* {file_name}: {type(error).__name__}: {error}")
+                results.append((file_name, None, error))
+                continue
+            hostnames, port_count, status, device_stats, stack_records = result
+            if database is not None:
+                try:
+                    database.add_stacks(stack_records, file_name)
+                except sqlite3.Error as error:  # Its outputs are written, its ports not
+                    print(f"*Failed* {file_name}: Database: {error}")
+                    results.append((file_name, None, error))
+                    continue
+            outputs = ", ".join(f"{hostname}.txt" for hostname in hostnames)
+            print(f"*{status.title()}* {file_name} -> {outputs}")
+            results.append((file_name, hostnames, None))
+            statuses[status] += 1
+            for device in device_stats:
+                STATS.add(device)
+                batch_stats.add(device)
+                devices.append(dict(device, source=file_name))
+            device_total += len(hostnames)
+            port_total += port_count
+    if cache is not None:
+        cache.evict()
+    if database is not None:
+        database.commit()  # The whole batch is one transaction
+        database.close()
+    stats_name = os.path.join(output_directory, "batch_stats.json")
+    batch_stats.dump(stats_name, devices)
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for result in results if result[2] is not None)
+    rate = device_total / elapsed if elapsed > 0 else 0.0
+    print(
+        f"*{len(results) - failed} Files Translated, {failed} Failed in "
+        f"{elapsed:.2f}s ({device_total} devices, {rate:.1f} devices/s, "
+        f"{port_total} ports)*"
+    )
+    if cache is not None:
+        print(
+            f"*Cache: {statuses['cached']} Rendered From Cache, "
+            f"{statuses['unchanged']} Unchanged*"
+        )
+    if database is not None:
+        print(f"*Ports Indexed in {database_name}*")
+    print(f"*Stats Written to {stats_name}*")
+    if profile is not None:
+        import shutil
+
+        print(merge_worker_profiles(profile_mode, profile_directory, profile_prefix))
+        shutil.rmtree(profile_directory, ignore_errors=True)
+        written = ".pstats, .collapsed" if profile_mode == "cprofile" else ".collapsed"
+        print(f"*Profile Written to {profile_prefix}{written} and .txt*")
+    return results
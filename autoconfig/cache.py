@@ -0,0 +1,70 @@
+import hashlib
+import os
+
+# On-disk store of translated stacks keyed by the content hash of the source file
+# plus a fingerprint of the translator and policy. Entries are bumped on every hit
+# and the least recently used ones are evicted once the directory is over budget
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+class Parse_Cache:
+    def __init__(
+        self, directory: str, fingerprint: str, max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    # Returns the cache key of a source file without reading it into memory
+    def key(self, file_name: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_name, "rb") as source_file:
+            for chunk in iter(lambda: source_file.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+        return hashlib.sha256(f"{content_hash}:{self.fingerprint}".encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+
+    # Returns a stored entry and marks it as recently used, or None on a miss
+    def load(self, key: str) -> bytes:
+        path = self.path(key)
+        try:
+            with open(path, "rb") as entry_file:
+                data = entry_file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    # Writes an entry atomically so concurrent workers never see a partial file
+    def store(self, key: str, data: bytes):
+        path = self.path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as entry_file:
+            entry_file.write(data)
+        os.replace(temporary_path, path)
+
+    # Removes least recently used entries until the cache fits in max_bytes
+    def evict(self) -> int:
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".bin"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,378 @@
+import argparse
+import os
+
+# Command line entry point. Every command imports what it needs when it runs, so
+# "--help" and the console start without loading the translator machinery:
+#
+#   python AutoConfigV3.py                          interactive console
+#   python AutoConfigV3.py translate Old_Config.txt --policy policy.json
+#   python AutoConfigV3.py batch configs/ out/ --cache .cache --workers 8
+#   python AutoConfigV3.py batch configs/ out/ --profile sample --profile-output run
+#   python AutoConfigV3.py batch configs/ out/ --pipeline --queue-size 32
+#   python AutoConfigV3.py query fleet.db vlan 240
+#   python AutoConfigV3.py delta Old_Config.txt running.txt --policy policy.json
+#   python AutoConfigV3.py preflight configs/ --workers 8
+#   python AutoConfigV3.py collect inventory.txt out/ --connections 64 --retries 2
+#   python AutoConfigV3.py fake-devices configs/ inventory.txt --latency 0.05
+#   python AutoConfigV3.py push inventory.txt out/ --rate 500 --window 64 --save
+#   python AutoConfigV3.py fake-switches out/ inventory.txt --latency 0.01
+#   python AutoConfigV3.py serve 127.0.0.1:8731 --policy policy.json
+
+
+def load_policy(file_name: str):
+    if file_name is None:
+        return None
+    from autoconfig.policy import Policy
+
+    return Policy.load(file_name)
+
+
+def console():
+    from autoconfig.policy import Policy
+    from autoconfig.stats import STATS
+    from autoconfig.batch import batch_translate
+    from autoconfig.translator import generate_config
+
+    command = ""
+    policy = None
+    cache_directory = None
+    database_name = None
+    while command != "exit":
+        command = input("> ")
+        if command.startswith("policy"):
+            policy = Policy.load(command[7:].strip())
+            print("*Policy Loaded, Prompts Disabled*")
+        elif command.startswith("cache"):
+            cache_directory = command[6:].strip() or None
+            print(f"*Batch Cache: {cache_directory or 'Off'}*")
+        elif command.startswith("database"):
+            database_name = command[9:].strip() or None
+            print(f"*Port Database: {database_name or 'Off'}*")
+        elif command.startswith("query"):
+            if database_name is None:
+                print("*Set a Port Database First*")
+                continue
+            run_query(database_name, *command[6:].split(None, 1))
+        elif command.startswith("batch"):
+            arguments = command[6:].split()
+            if not arguments:
+                print("batch [directory or glob] [output directory]")
+                continue
+            batch_translate(
+                *arguments[:2],
+                policy=policy,
+                cache_directory=cache_directory,
+                database_name=database_name,
+            )
+        elif command.startswith("delta"):
+            arguments = command[6:].split()
+            if len(arguments) != 2:
+                print("delta [filename.txt] [running config.txt]")
+                continue
+            report_delta(*arguments, policy)
+        elif command.startswith("preflight"):
+            source = command[10:].strip()
+            if not source:
+                print("preflight [directory or glob]")
+                continue
+            report_preflight(source)
+        elif command.startswith("collect"):
+            arguments = command[8:].split()
+            if not arguments:
+                print("collect [inventory.txt] [output directory]")
+                continue
+            from autoconfig.collector import collect_configs
+
+            collect_configs(*arguments[:2], policy=policy)
+        elif command.startswith("serve"):
+            from autoconfig.server import DEFAULT_ADDRESS, serve
+
+            serve(command[6:].strip() or DEFAULT_ADDRESS, policy)
+        elif command.strip() == "stats":
+            print(STATS.report())
+        elif "translate" in command:
+            generate_config(command[10:], policy)
+            print("*New Configuration Generated Successfully*")
+        elif "?" in command:
+            print("translate [filename.txt]")
+            print("batch [directory or glob] [output directory]")
+            print("delta [filename.txt] [running config.txt]")
+            print("preflight [directory or glob]")
+            print("collect [inventory.txt] [output directory]")
+            print("policy [policy.json]")
+            print("cache [directory]")
+            print("database [ports.db]")
+            print("query [vlan 240, description Lab Phone, unused or stack ROB-SW-1]")
+            print("serve [host:port or socket path]")
+            print("stats")
+
+
+def run_translate(arguments):
+    from autoconfig.stats import STATS
+    from autoconfig.translator import generate_config
+
+    policy = load_policy(arguments.policy)
+    if arguments.profile is None:
+        generate_config(arguments.file, policy)
+    else:
+        from autoconfig.profiling import profile_call
+
+        prefix = arguments.profile_output
+        profile_call(arguments.profile, prefix, generate_config, arguments.file, policy)
+    print("*New Configuration Generated Successfully*")
+    if arguments.stats:
+        print(STATS.report())
+
+
+def run_batch(arguments):
+    if arguments.pipeline:
+        return run_pipeline(arguments)
+    from autoconfig.batch import batch_translate
+
+    profile = None
+    if arguments.profile is not None:
+        profile = (arguments.profile, arguments.profile_output)
+    results = batch_translate(
+        arguments.source,
+        arguments.output_directory,
+        load_policy(arguments.policy),
+        arguments.workers,
+        arguments.cache,
+        arguments.database,
+        profile,
+    )
+    return 1 if any(error is not None for _, _, error in results) else 0
+
+
+def run_pipeline(arguments):
+    if arguments.cache or arguments.database or arguments.profile:
+        print("*--pipeline Cannot Be Used With --cache, --database or --profile*")
+        return 1
+    from autoconfig.pipeline import pipeline_translate
+
+    results = pipeline_translate(
+        arguments.source,
+        arguments.output_directory,
+        load_policy(arguments.policy),
+        arguments.workers,
+        arguments.queue_size,
+    )
+    return 1 if any(error is not None for _, _, error in results) else 0
+
+
+def report_delta(file_name: str, running_name: str, policy=None):
+    from autoconfig.delta import generate_delta
+
+    hostname, delta_lines, lines = generate_delta(file_name, running_name, policy)
+    print(
+        f"*{delta_lines} of {lines} Lines Changed, "
+        f"Delta Written to {hostname}.delta.txt*"
+    )
+
+
+def run_delta(arguments):
+    report_delta(arguments.file, arguments.running, load_policy(arguments.policy))
+
+
+def report_preflight(source: str, workers: int = None) -> int:
+    from autoconfig.preflight import preflight
+
+    report = preflight(source, workers)
+    print(report.report())
+    return 1 if report.conflicts else 0
+
+
+def run_preflight(arguments):
+    return report_preflight(arguments.source, arguments.workers)
+
+
+def run_collect(arguments):
+    from autoconfig.collector import collect_configs
+
+    results = collect_configs(
+        arguments.inventory,
+        arguments.output_directory,
+        load_policy(arguments.policy),
+        arguments.connections,
+        arguments.timeout,
+        arguments.retries,
+    )
+    return 1 if any(result.error is not None for result in results) else 0
+
+
+def run_fake_devices(arguments):
+    from autoconfig.fake_devices import serve_fake_devices
+
+    serve_fake_devices(
+        arguments.source,
+        arguments.inventory,
+        host=arguments.host,
+        latency=arguments.latency,
+        bytes_per_second=arguments.bytes_per_second,
+        drop_rate=arguments.drop_rate,
+    )
+
+
+def run_push(arguments):
+    from autoconfig.push import push_configs
+
+    results = push_configs(
+        arguments.inventory,
+        arguments.config_directory,
+        arguments.connections,
+        arguments.rate,
+        arguments.window,
+        arguments.save,
+    )
+    return 0 if all(result.ok for result in results) else 1
+
+
+def run_fake_switches(arguments):
+    from autoconfig.fake_devices import serve_fake_switches
+    from autoconfig.translator import find_configs
+
+    names = [
+        os.path.splitext(os.path.basename(file_name))[0]
+        for file_name in find_configs(os.path.join(arguments.config_directory, "*.txt"))
+    ]
+    serve_fake_switches(
+        names,
+        arguments.inventory,
+        host=arguments.host,
+        latency=arguments.latency,
+        command_time=arguments.command_time,
+        reject=arguments.reject,
+    )
+
+
+def run_query(database_name: str, name: str = "", argument: str = None):
+    from autoconfig.port_database import Port_Database
+
+    database = Port_Database(database_name)
+    try:
+        rows = database.query(name, argument)
+    except ValueError as error:
+        print(f"*{error}*")
+        return 1
+    finally:
+        database.close()
+    for row in rows:
+        print("  ".join(str(value) for value in row))
+    print(f"*{len(rows)} Rows*")
+    return 0
+
+
+def run_query_command(arguments):
+    return run_query(arguments.database, arguments.name, arguments.argument)
+
+
+def run_serve(arguments):
+    from autoconfig.server import serve
+
+    serve(arguments.address, load_policy(arguments.policy), arguments.workers)
+
+
+def run_console(arguments):
+    console()
+
+
+def add_profile_arguments(parser):
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="cprofile",
+        choices=("cprofile", "sample"),  # profiling.MODES, without importing it
+        help="Profile the run, with cProfile unless sample is given",
+    )
+    parser.add_argument(
+        "--profile-output", default="profile", help="Prefix of the profile files"
+    )
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="AutoConfigV3", description="Translate Comware configs to AOS-CX"
+    )
+    commands = parser.add_subparsers(dest="command")
+    translate = commands.add_parser("translate", help="Translate one file")
+    translate.add_argument("file")
+    translate.add_argument("--policy", help="Answer prompts from this policy file")
+    translate.add_argument("--stats", action="store_true", help="Print timings")
+    add_profile_arguments(translate)
+    translate.set_defaults(run=run_translate)
+    batch = commands.add_parser("batch", help="Translate a directory or glob")
+    batch.add_argument("source")
+    batch.add_argument("output_directory", nargs="?", default=".")
+    batch.add_argument("--policy", help="Answer prompts from this policy file")
+    batch.add_argument("--cache", help="Cache translated stacks in this directory")
+    batch.add_argument("--workers", type=int, help="Worker processes")
+    batch.add_argument("--database", help="Index every port in this SQLite file")
+    add_profile_arguments(batch)
+    batch.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Read, parse, render and write in separate stages",
+    )
+    batch.add_argument(
+        "--queue-size",
+        type=int,
+        default=16,  # pipeline.DEFAULT_QUEUE_SIZE, without importing it
+        help="Jobs waiting in front of each pipeline stage",
+    )
+    batch.set_defaults(run=run_batch)
+    delta = commands.add_parser("delta", help="Only the changes a running switch needs")
+    delta.add_argument("file")
+    delta.add_argument("running", help="The AOS-CX configuration on the switch")
+    delta.add_argument("--policy", help="Answer prompts from this policy file")
+    delta.set_defaults(run=run_delta)
+    preflight = commands.add_parser("preflight", help="Find conflicts in a fleet")
+    preflight.add_argument("source")
+    preflight.add_argument("--workers", type=int, help="Worker processes")
+    preflight.set_defaults(run=run_preflight)
+    collect = commands.add_parser("collect", help="Pull and translate live configs")
+    collect.add_argument("inventory", help='"name host:port" lines')
+    collect.add_argument("output_directory", nargs="?", default=".")
+    collect.add_argument("--policy", help="Answer prompts from this policy file")
+    collect.add_argument("--connections", type=int, default=32, help="Open at once")
+    collect.add_argument("--timeout", type=float, default=30.0, help="Per attempt")
+    collect.add_argument("--retries", type=int, default=2)
+    collect.set_defaults(run=run_collect)
+    fake = commands.add_parser("fake-devices", help="Serve configs as fake devices")
+    fake.add_argument("source", help="Directory or glob of Comware configs")
+    fake.add_argument("inventory", nargs="?", default="inventory.txt")
+    fake.add_argument("--host", default="127.0.0.1")
+    fake.add_argument("--latency", type=float, default=0.0, help="Per command")
+    fake.add_argument("--bytes-per-second", type=float)
+    fake.add_argument("--drop-rate", type=float, default=0.0)
+    fake.set_defaults(run=run_fake_devices)
+    push = commands.add_parser("push", help="Send generated configs to switches")
+    push.add_argument("inventory", help='"name host:port" lines, name.txt is sent')
+    push.add_argument("config_directory", nargs="?", default=".")
+    push.add_argument("--connections", type=int, default=32, help="Open at once")
+    push.add_argument("--rate", type=float, help="Commands per second, all switches")
+    push.add_argument("--window", type=int, default=64, help="Commands in flight")
+    push.add_argument("--save", action="store_true", help="Finish with write memory")
+    push.set_defaults(run=run_push)
+    switches = commands.add_parser("fake-switches", help="Fake AOS-CX switches")
+    switches.add_argument("config_directory", help="One switch per .txt file")
+    switches.add_argument("inventory", nargs="?", default="inventory.txt")
+    switches.add_argument("--host", default="127.0.0.1")
+    switches.add_argument("--latency", type=float, default=0.0, help="Round trip")
+    switches.add_argument("--command-time", type=float, default=0.0)
+    switches.add_argument("--reject", action="append", default=[], help="Prefix")
+    switches.set_defaults(run=run_fake_switches)
+    query = commands.add_parser("query", help="Look up ports in a port database")
+    query.add_argument("database")
+    query.add_argument("name", choices=("vlan", "description", "unused", "stack"))
+    query.add_argument("argument", nargs="?")
+    query.set_defaults(run=run_query_command)
+    default_address = "127.0.0.1:8731"  # server.DEFAULT_ADDRESS, without importing it
+    serve = commands.add_parser("serve", help="Run the translation server")
+    serve.add_argument("address", nargs="?", default=default_address)
+    serve.add_argument("--policy", help="Answer prompts from this policy file")
+    serve.add_argument("--workers", type=int, help="Worker processes")
+    serve.set_defaults(run=run_serve)
+    commands.add_parser("console", help="Interactive console (the default)")
+    arguments = parser.parse_args(argv)
+    run = getattr(arguments, "run", run_console)
+    return run(arguments) or 0
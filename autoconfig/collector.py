@@ -0,0 +1,218 @@
+import asyncio
+import os
+import random
+import time
+
+from autoconfig.policy import Policy
+from autoconfig.stats import STATS, Stats
+from autoconfig.translator import Translator, write_configuration
+
+# Pulls running configurations from many devices at once and translates each one
+# as it arrives, straight from memory, so nothing is captured by hand or written
+# to a temp file first. At most `connections` sessions are open at a time, every
+# attempt has its own timeout, and a failed attempt is retried after a growing,
+# jittered delay that does not hold a connection slot. Translating and writing
+# run on one thread beside the event loop, so a large device never stalls the
+# other sessions, and a device that fails to translate only fails its target.
+#
+# The device side is a transport: any object with "async fetch(target)" returning
+# the configuration lines. TCP_Transport speaks the plain text CLI of a console
+# server or telnet session without option negotiation; an SSH transport would
+# plug in the same way. fake_devices.Fake_Comware_Server answers it offline
+DEFAULT_CONNECTIONS = 32
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 2
+RETRY_DELAY = 0.5  # Seconds before the first retry, doubled after every failure
+COMMANDS = ("screen-length disable", "display current-configuration", "quit")
+
+
+class Target:
+    def __init__(self, name: str, host: str, port: int = 23):
+        self.name = name
+        self.host = host
+        self.port = port
+
+    def __repr__(self) -> str:
+        return f"{self.name} ({self.host}:{self.port})"
+
+
+# Reads "[name] host[:port]" lines, skipping blanks and # comments
+def load_inventory(file_name: str) -> list:
+    targets = []
+    with open(file_name, "r") as inventory_file:
+        for line in inventory_file:
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            host, _, port = fields[-1].partition(":")
+            targets.append(Target(fields[0], host, int(port or 23)))
+    return targets
+
+
+class TCP_Transport:
+    def __init__(self, commands: tuple = COMMANDS):
+        self.commands = "".join(f"{command}\n" for command in commands).encode()
+
+    # Sends every command at once and reads until the configuration's return line
+    async def fetch(self, target: Target) -> list:
+        reader, writer = await asyncio.open_connection(target.host, target.port)
+        try:
+            writer.write(self.commands)
+            await writer.drain()
+            lines = []
+            while True:
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionError("Session closed before return")
+                line = line.decode("utf-8", "replace")
+                lines.append(line)
+                if line.strip() == "return":
+                    return lines
+        finally:
+            writer.close()
+
+
+class Collect_Result:
+    def __init__(self, target: Target):
+        self.target = target
+        self.hostnames = []
+        self.error = None
+        self.attempts = 0
+        self.seconds = 0.0
+
+
+class Collector:
+    def __init__(
+        self,
+        transport=None,
+        policy: Policy = None,
+        connections: int = DEFAULT_CONNECTIONS,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+    ):
+        self.transport = transport or TCP_Transport()
+        self.translator = Translator(policy or Policy())
+        self.connections = connections
+        self.timeout = timeout
+        self.retries = retries
+        self.stats = Stats()
+        self.open_connections = 0
+        self.peak_connections = 0
+        self.slots = None
+        self.executor = None
+
+    # Returns the configuration lines of a target, retrying failed attempts
+    async def fetch(self, target: Target, result: Collect_Result) -> list:
+        delay = RETRY_DELAY
+        while True:
+            result.attempts += 1
+            try:
+                async with self.slots:
+                    self.open_connections += 1
+                    self.peak_connections = max(
+                        self.peak_connections, self.open_connections
+                    )
+                    try:
+                        return await asyncio.wait_for(
+                            self.transport.fetch(target), self.timeout
+                        )
+                    finally:
+                        self.open_connections -= 1
+            except (OSError, asyncio.TimeoutError):
+                if result.attempts > self.retries:
+                    raise
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            delay *= 2
+
+    # Writes a configuration per device in the lines and returns their stats. Runs
+    # on the executor's thread, never on the event loop
+    def translate_lines(self, lines: list, output_directory: str) -> list:
+        device_stats = []
+        for stack in self.translator.iter_stacks(lines):
+            config_name = os.path.join(output_directory, f"{stack.hostname}.txt")
+            write_configuration(stack, config_name)
+            device_stats.append(stack.stats.as_dict())
+        if not device_stats:
+            raise ValueError("No device configuration in the output")
+        return device_stats
+
+    # Collects one target and writes a configuration per device it holds
+    async def collect_target(self, target: Target, output_directory: str):
+        result = Collect_Result(target)
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            lines = await self.fetch(target, result)
+            device_stats = await loop.run_in_executor(
+                self.executor, self.translate_lines, lines, output_directory
+            )
+            for device in device_stats:
+                self.stats.add(device)
+                STATS.add(device)
+                result.hostnames.append(device["hostname"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:  # A device that will not translate fails alone
+            result.error = error
+        result.seconds = time.perf_counter() - start
+        return result
+
+    # Yields a Collect_Result per target as each one finishes
+    async def collect(self, targets: list, output_directory: str = "."):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.slots = asyncio.Semaphore(self.connections)
+        # One thread, since translating is CPU bound and the block cache is not
+        # shared safely between threads
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        os.makedirs(output_directory, exist_ok=True)
+        tasks = [
+            asyncio.ensure_future(self.collect_target(target, output_directory))
+            for target in targets
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_collector(collector: Collector, targets: list, output_directory: str):
+    results = []
+    async for result in collector.collect(targets, output_directory):
+        results.append(result)
+        if result.error is None:
+            outputs = ", ".join(f"{hostname}.txt" for hostname in result.hostnames)
+            print(f"*Collected* {result.target} -> {outputs}")
+        else:
+            error = result.error
+            print(f"*Failed* {result.target}: {type(error).__name__}: {error}")
+    return results
+
+
+# Collects and translates every target in an inventory file
+def collect_configs(
+    inventory_name: str,
+    output_directory: str = ".",
+    policy: Policy = None,
+    connections: int = DEFAULT_CONNECTIONS,
+    timeout: float = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    transport=None,
+) -> list:
+    targets = load_inventory(inventory_name)
+    collector = Collector(transport, policy, connections, timeout, retries)
+    start = time.perf_counter()
+    results = asyncio.run(run_collector(collector, targets, output_directory))
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for result in results if result.error is not None)
+    retried = sum(1 for result in results if result.attempts > 1)
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    print(
+        f"*{len(results) - failed} Devices Collected, {failed} Failed in "
+        f"{elapsed:.2f}s ({rate:.1f} devices/s, {retried} retried, "
+        f"{collector.peak_connections} connections at peak)*"
+    )
+    return results
@@ -0,0 +1,164 @@
+from autoconfig.policy import Policy
+from autoconfig.translator import (
+    Port_Group,
+    Port_Table,
+    Translator,
+    get_interface_commands,
+)
+
+# Minimal changes between an AOS-CX configuration already on a switch and the one
+# the translator would generate. Both sides are read into the same model, so the
+# target is the translator's own rendering parsed back in: the lines set at the
+# top level, the lines of named interfaces (vlan 1, the lag) and the lines that
+# apply to every port, keyed as member << 16 | port like get_interface_runs. Each
+# port line remembers the block that set it, so ports that need the same lines of
+# the same block are grouped and range compressed the way the full render is
+TOP_LEVEL = ("hostname ", "interface ", "ip route ", "vsf ", "write ", "router ")
+REMOVABLE = ("vlan access", "description")
+
+
+class Running_Config:
+    def __init__(self):
+        self.lines = {}
+        self.interfaces = {}
+        self.ports = {}
+
+    def add_port_lines(self, interfaces: str, lines: dict):
+        for key in expand_interfaces(interfaces):
+            port_lines = self.ports.get(key)
+            if port_lines is None:
+                self.ports[key] = dict(lines)
+            else:
+                port_lines.update(lines)
+
+
+# Returns the keys of "1/1/1-1/1/4,2/1/7" in order, or None for a named interface
+def expand_interfaces(interfaces: str) -> list:
+    keys = []
+    for location in interfaces.split(","):
+        first, _, last = location.partition("-")
+        try:
+            blade_number, _, first_port = (int(part) for part in first.split("/"))
+            last_port = int(last.split("/")[2]) if last else first_port
+        except ValueError:
+            return None
+        key = blade_number << 16
+        keys.extend(range(key | first_port, (key | last_port) + 1))
+    return keys
+
+
+def is_top_level(line: str) -> bool:
+    if line.startswith(TOP_LEVEL):
+        return True
+    # "vlan 40" declares a vlan, "vlan access 40" belongs to an interface
+    return line.startswith("vlan ") and line[5:6].isdigit()
+
+
+# Reads an AOS-CX configuration, with or without indentation and exit lines
+def parse_running_config(lines) -> Running_Config:
+    config = Running_Config()
+    interface = None
+    block = {}
+    block_number = 0
+
+    def close_block():
+        if interface is None:
+            return
+        if expand_interfaces(interface) is None:
+            config.interfaces.setdefault(interface, {}).update(block)
+        else:
+            config.add_port_lines(interface, block)
+
+    for line in lines:
+        indented = line[:1].isspace()
+        line = line.strip()
+        if not line or line in ("!", "exit"):
+            close_block()
+            interface = None
+            continue
+        if interface is not None and (indented or not is_top_level(line)):
+            block[line] = block_number
+            continue
+        close_block()
+        interface = None
+        if line.startswith("interface "):
+            interface = line[10:].strip()
+            block = {}
+            block_number += 1
+        else:
+            config.lines[line] = None
+    close_block()
+    return config
+
+
+def format_block(interface_command: str, lines: list) -> list:
+    commands = [interface_command]
+    commands.extend(f"{line}\n" for line in lines)
+    commands[-1] += "\n"
+    return commands
+
+
+# Returns the lines a port still needs as (block, lines) pairs, overwriting single
+# valued commands and removing a vlan access or description the target lacks
+def get_port_changes(target: dict, existing: dict) -> list:
+    changes = {}
+    for line, block_number in target.items():
+        if line not in existing:
+            changes.setdefault(block_number, []).append(line)
+    for family in REMOVABLE:
+        prefix = f"{family} "
+        if any(line.startswith(prefix) for line in existing) and not any(
+            line.startswith(prefix) for line in target
+        ):
+            changes.setdefault(0, []).append(f"no {family}")
+    return [(block_number, tuple(lines)) for block_number, lines in changes.items()]
+
+
+# Returns only the commands that turn the existing configuration into the target
+def get_delta(target: Running_Config, existing: Running_Config) -> list:
+    commands = [f"{line}\n\n" for line in target.lines if line not in existing.lines]
+    for interface, lines in target.interfaces.items():
+        current = existing.interfaces.get(interface, {})
+        changes = [line for line in lines if line not in current]
+        if changes:
+            commands.extend(format_block(f"interface {interface}\n", changes))
+    empty = {}
+    groups = {}
+    for key, lines in target.ports.items():
+        for changes in get_port_changes(lines, existing.ports.get(key, empty)):
+            groups.setdefault(changes, []).append(key)
+    groups = dict(sorted(groups.items(), key=lambda group: group[0][0]))
+    table = Port_Table()
+    port_groups = []
+    for keys in groups.values():
+        group = Port_Group(None, None, table)
+        for key in keys:
+            group.rows.append(table.append(key >> 16, key & 0xFFFF))
+        port_groups.append(group)
+    interface_commands = get_interface_commands(table, port_groups)
+    for (_, changes), interface_command in zip(groups, interface_commands):
+        commands.extend(format_block(interface_command, changes))
+    return commands
+
+
+# Writes <hostname>.delta.txt with the changes a switch running running_name needs
+# to match the translation of file_name. Returns (hostname, delta lines, lines)
+def generate_delta(file_name: str, running_name: str, policy: Policy = None) -> tuple:
+    with open(running_name, "r") as running_file:
+        existing = parse_running_config(running_file)
+    hostnames = {line[9:] for line in existing.lines if line.startswith("hostname ")}
+    stack = None
+    with open(file_name, "r") as old_config_file:
+        for candidate in Translator(policy).iter_stacks(old_config_file):
+            if stack is None or candidate.hostname in hostnames:
+                stack = candidate
+            if candidate.hostname in hostnames:
+                break
+    if stack is None:
+        raise ValueError(f"No device configuration found in {file_name}")
+    rendered = "".join(stack.iter_configuration()).splitlines()
+    delta = get_delta(parse_running_config(rendered), existing)
+    with open(f"{stack.hostname}.delta.txt", "w") as delta_file:
+        delta_file.writelines(delta)
+    delta_lines = sum(command.count("\n") for command in delta)
+    return (stack.hostname, delta_lines, len(rendered))
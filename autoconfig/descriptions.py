@@ -0,0 +1,200 @@
+import re
+from functools import lru_cache
+
+# Port descriptions to drop or rewrite, e.g. access points whose ports should come
+# up unlabelled. Each rule matches a substring, a whole word or a regex, ignoring
+# case, and drops the description unless it has a replacement for the match:
+#
+# [
+#     {"substring": "ap"},
+#     {"word": "ruckus", "replace": "WAP"},
+#     {"regex": "^pc ?\\d+$", "replace": "Workstation"}
+# ]
+#
+# All rules compile into one regex: substrings and words are merged into a prefix
+# tree per kind so a position is tried against the next character instead of every
+# keyword, and the regex rules are alternatives next to them. The regex runs case
+# sensitively over the lowered description, which is several times faster than
+# IGNORECASE, so a description is scanned once however many rules there are, and
+# only once per distinct text while it is among the last RESULTS_SIZE used. A
+# regex with groups or global flags would change meaning or fail to compile inside
+# the shared pattern, so it is matched on its own and its matches are merged with
+# the others, leftmost first
+RULE_KINDS = ("substring", "word", "regex")
+RESULTS_SIZE = 65536  # Distinct descriptions each filter remembers the result of
+
+
+class Description_Rule:
+    def __init__(self, kind: str, pattern: str, replace: str = None):
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Unknown description rule {kind}")
+        if not pattern:
+            raise ValueError(f"Empty {kind} description rule")
+        self.kind = kind
+        self.pattern = pattern if kind == "regex" else pattern.lower()
+        self.replace = replace
+
+    @classmethod
+    def from_dict(cls, rule: dict):
+        kinds = [kind for kind in RULE_KINDS if kind in rule]
+        unknown = set(rule) - set(RULE_KINDS) - {"replace"}
+        if len(kinds) != 1 or unknown:
+            raise ValueError(f"Invalid description rule {rule}")
+        return cls(kinds[0], rule[kinds[0]], rule.get("replace"))
+
+    def to_dict(self) -> dict:
+        rule = {self.kind: self.pattern}
+        if self.replace is not None:
+            rule["replace"] = self.replace
+        return rule
+
+
+# Tests if a regex rule still compiles as one alternative of the shared pattern.
+# Global flags like (?i) only compile at the start of a whole pattern
+def is_embeddable(alternative: str) -> bool:
+    try:
+        re.compile(alternative)
+    except re.error:
+        return False
+    return True
+
+
+# Returns a regex matching any of the words, with shared prefixes factored out
+def compile_trie(words: list) -> str:
+    trie = {}
+    for word in words:
+        node = trie
+        for character in word:
+            node = node.setdefault(character, {})
+        node[""] = None
+
+    def render(node: dict) -> str:
+        ends = "" in node
+        branches = [
+            re.escape(character) + render(child)
+            for character, child in sorted(node.items())
+            if character
+        ]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # A keyword that is a prefix of another is an optional, greedy tail, so the
+        # longest keyword at a position wins
+        return f"(?:{pattern})?" if ends else pattern
+
+    return render(trie)
+
+
+class Description_Filter:
+    def __init__(self, rules: list = ()):
+        self.rules = [
+            Description_Rule.from_dict(rule) if isinstance(rule, dict) else rule
+            for rule in rules
+        ]
+        # Keyword rules are found by the lowered text they match, regex rules by
+        # the name of their group. A repeated keyword keeps its first rule
+        self.keywords = {"substring": {}, "word": {}}
+        self.separate = []  # (rule, pattern) for regexes matched on their own
+        alternatives = []
+        for index, rule in enumerate(self.rules):
+            if rule.kind == "regex":
+                try:
+                    pattern = re.compile(rule.pattern, re.IGNORECASE)
+                except re.error as error:
+                    raise ValueError(
+                        f"Invalid description regex {rule.pattern!r}: {error}"
+                    ) from None
+                alternative = f"(?P<r{index}>(?i:{rule.pattern}))"
+                if pattern.groups == 0 and is_embeddable(alternative):
+                    alternatives.append(alternative)
+                else:
+                    self.separate.append((rule, pattern))
+            else:
+                self.keywords[rule.kind].setdefault(rule.pattern, rule)
+        if self.keywords["word"]:
+            words = compile_trie(self.keywords["word"])
+            alternatives.insert(0, rf"(?P<word>\b{words}\b)")
+        if self.keywords["substring"]:
+            substrings = compile_trie(self.keywords["substring"])
+            alternatives.insert(0, f"(?P<substring>{substrings})")
+        self.pattern = None
+        self.unicode_pattern = None
+        if alternatives:
+            self.pattern = re.compile("|".join(alternatives))
+            # For the rare text whose lowered form has a different length, where
+            # match positions would not line up with the original
+            self.unicode_pattern = re.compile("|".join(alternatives), re.IGNORECASE)
+        # apply(description) is filter behind a bounded cache of its results, called
+        # directly so a cached description costs no Python frame
+        self.apply = lru_cache(maxsize=RESULTS_SIZE)(self.filter)
+
+    # The cache wraps a bound method, so it is rebuilt rather than pickled when a
+    # policy is sent to a worker process
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state["apply"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.apply = lru_cache(maxsize=RESULTS_SIZE)(self.filter)
+
+    # Returns the description with every rule applied, or None if a rule drops it
+    def filter(self, description: str) -> str:
+        if description is None or not self.rules:
+            return description
+        pieces = []
+        position = 0
+        result = description
+        for start, end, rule in self.find(description):
+            if rule.replace is None:
+                result = None
+                break
+            pieces.append(description[position:start])
+            pieces.append(rule.replace)
+            position = end
+        else:
+            if pieces:
+                pieces.append(description[position:])
+                result = "".join(pieces).strip() or None
+        return result
+
+    # Yields (start, end, rule) for every match that does not overlap an earlier one
+    def find(self, description: str):
+        matches = []
+        if self.pattern is not None:
+            lowered = description.lower()
+            if len(lowered) == len(description):
+                found = self.pattern.finditer(lowered)
+            else:
+                found = self.unicode_pattern.finditer(description)
+            for match in found:
+                group = match.lastgroup
+                if group in self.keywords:
+                    rule = self.keywords[group][match[group].lower()]
+                else:
+                    rule = self.rules[int(group[1:])]
+                matches.append((match.start(), match.end(), rule))
+        if not self.separate:
+            yield from matches
+            return
+        for rule, pattern in self.separate:
+            matches.extend(
+                (match.start(), match.end(), rule)
+                for match in pattern.finditer(description)
+            )
+        # The sort is stable, so a tie goes to the shared pattern, then rule order
+        matches.sort(key=lambda match: match[0])
+        position = 0
+        for match in matches:
+            if match[0] >= position:
+                yield match
+                position = match[1]
+
+    def to_list(self) -> list:
+        return [rule.to_dict() for rule in self.rules]
+
+
+# The keywords each translator has always dropped, when a policy sets no rules
+DEFAULT_RULES = [{"substring": "ap"}, {"substring": "pa"}]
+LEGACY_RULES = [{"substring": "ap"}, {"substring": "ruckus"}]
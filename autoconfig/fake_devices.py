@@ -0,0 +1,303 @@
+import asyncio
+import os
+import random
+from functools import partial
+
+from autoconfig.delta import is_top_level
+from autoconfig.translator import find_configs
+
+# Local stand-ins for real hardware, so collection and pushes can be tested and
+# measured offline. Each fake listens on one port per device, the way a lab of
+# switches would.
+#
+# Fake_Comware_Server answers the plain text CLI the collector's TCP transport
+# speaks: a <hostname> prompt, then "display current-configuration" prints the
+# configuration and "quit" closes the session. Latency, a slow link and dropped
+# sessions can be simulated to exercise the collector's timeouts and retries.
+#
+# Fake_AOSCX_Server echoes every line and answers it with an AOS-CX prompt that
+# follows the config context, e.g. switch(config-if-<1/1/1-1/1/48>)# after an
+# interface range, rejects lines starting with any of its reject prefixes and
+# records every line it received per switch. Its latency delays responses on
+# the way back without holding up the next command, like a network round trip,
+# and command_time is how long the switch spends on each command in turn
+CHUNK_SIZE = 4096
+
+
+# Reads every config in a directory or glob as (name, text) pairs
+def load_configs(source: str) -> list:
+    configs = []
+    for file_name in find_configs(source):
+        with open(file_name, "r") as config_file:
+            name = os.path.splitext(os.path.basename(file_name))[0]
+            configs.append((name, config_file.read()))
+    return configs
+
+
+class Fake_Comware_Server:
+    def __init__(
+        self,
+        configs: list,
+        latency: float = 0.0,
+        bytes_per_second: float = None,
+        drop_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.configs = configs
+        self.latency = latency  # Seconds before each command is answered
+        self.bytes_per_second = bytes_per_second
+        self.drop_rate = drop_rate  # Share of sessions cut off mid configuration
+        self.random = random.Random(seed)
+        self.servers = []
+        self.sessions_open = set()
+        self.connections = 0
+        self.peak_connections = 0
+        self.sessions = 0
+        self.served = 0
+        self.dropped = 0
+
+    # Listens on one port per config and returns the (name, host, port) targets
+    async def start(self, host: str = "127.0.0.1") -> list:
+        targets = []
+        for name, config in self.configs:
+            prompt = f"<{get_sysname(config)}>".encode()
+            handle = partial(self.handle, prompt=prompt, config=config.encode())
+            server = await asyncio.start_server(handle, host, 0)
+            self.servers.append(server)
+            port = server.sockets[0].getsockname()[1]
+            targets.append((name, host, port))
+        return targets
+
+    async def close(self):
+        for server in self.servers:
+            server.close()
+        # Sessions still waiting out their latency when a client gave up
+        for task in self.sessions_open:
+            task.cancel()
+        await asyncio.gather(*self.sessions_open, return_exceptions=True)
+        for server in self.servers:
+            await server.wait_closed()
+        self.servers = []
+
+    async def handle(self, reader, writer, prompt: bytes, config: bytes):
+        task = asyncio.current_task()
+        self.sessions_open.add(task)
+        self.connections += 1
+        self.sessions += 1
+        self.peak_connections = max(self.peak_connections, self.connections)
+        try:
+            writer.write(prompt)
+            while True:
+                line = await reader.readline()
+                command = line.decode().strip()
+                if not line or command == "quit":
+                    break
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if command == "display current-configuration":
+                    if not await self.send_config(writer, config):
+                        break
+                writer.write(b"\r\n" + prompt)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # A cancelled session is the server closing, not an error
+        finally:
+            self.sessions_open.discard(task)
+            self.connections -= 1
+            writer.close()
+
+    # Returns False when the session is dropped part way through
+    async def send_config(self, writer, config: bytes) -> bool:
+        end = len(config)
+        if self.drop_rate and self.random.random() < self.drop_rate:
+            end = self.random.randrange(end)
+        for start in range(0, end, CHUNK_SIZE):
+            writer.write(config[start : min(start + CHUNK_SIZE, end)])
+            await writer.drain()
+            if self.bytes_per_second:
+                await asyncio.sleep(CHUNK_SIZE / self.bytes_per_second)
+        if end < len(config):
+            self.dropped += 1
+            return False
+        self.served += 1
+        return True
+
+    def summary(self) -> dict:
+        return {
+            "sessions": self.sessions,
+            "served": self.served,
+            "dropped": self.dropped,
+            "peak_connections": self.peak_connections,
+        }
+
+
+class Fake_AOSCX_Server:
+    def __init__(
+        self,
+        names: list,
+        latency: float = 0.0,
+        command_time: float = 0.0,
+        reject: tuple = (),
+    ):
+        self.names = names
+        self.latency = latency
+        self.command_time = command_time
+        self.reject = tuple(reject)
+        self.received = {name: [] for name in names}
+        self.servers = []
+        self.sessions_open = set()
+        self.connections = 0
+        self.peak_connections = 0
+        self.sessions = 0
+        self.commands = 0
+
+    async def start(self, host: str = "127.0.0.1") -> list:
+        targets = []
+        for name in self.names:
+            handle = partial(self.handle, received=self.received[name])
+            server = await asyncio.start_server(handle, host, 0)
+            self.servers.append(server)
+            targets.append((name, host, server.sockets[0].getsockname()[1]))
+        return targets
+
+    async def close(self):
+        for server in self.servers:
+            server.close()
+        for task in self.sessions_open:
+            task.cancel()
+        await asyncio.gather(*self.sessions_open, return_exceptions=True)
+        for server in self.servers:
+            await server.wait_closed()
+        self.servers = []
+
+    # Returns the output of a command and the context it leaves the session in
+    def run_command(self, command: str, context: str) -> tuple:
+        if command.startswith(self.reject):
+            return (f"Invalid input: {command}\n", context)
+        if command in ("configure terminal", "configure", "config"):
+            return ("", "config")
+        if command == "end":
+            return ("", "")
+        if command == "exit":
+            return ("", "config" if context.startswith("config-") else "")
+        if command == "write memory":
+            return ("Copying configuration: [Success]\n", context)
+        if not context:
+            return (f"Invalid input: {command}\n", context)
+        if command.startswith("interface "):
+            return ("", get_interface_context(command[10:].strip()))
+        if is_top_level(command):
+            return ("", "config")
+        return ("", context)
+
+    async def handle(self, reader, writer, received: list):
+        task = asyncio.current_task()
+        self.sessions_open.add(task)
+        self.connections += 1
+        self.sessions += 1
+        self.peak_connections = max(self.peak_connections, self.connections)
+        loop = asyncio.get_running_loop()
+        hostname = "switch"
+        context = ""
+        try:
+            writer.write(f"{hostname}# ".encode())
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode().strip()
+                received.append(command)
+                self.commands += 1
+                if self.command_time:
+                    await asyncio.sleep(self.command_time)
+                output, context = self.run_command(command, context)
+                if command.startswith("hostname ") and context:
+                    hostname = command[9:].strip()
+                prompt = f"{hostname}({context})# " if context else f"{hostname}# "
+                response = f"{command}\r\n{output}{prompt}".encode()
+                if self.latency:
+                    loop.call_later(self.latency, writer.write, response)
+                else:
+                    writer.write(response)
+                    await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.sessions_open.discard(task)
+            self.connections -= 1
+            writer.close()
+
+    def summary(self) -> dict:
+        return {
+            "sessions": self.sessions,
+            "commands": self.commands,
+            "peak_connections": self.peak_connections,
+        }
+
+
+# Returns the context an AOS-CX switch enters for an interface command
+def get_interface_context(interface: str) -> str:
+    if interface.startswith("vlan"):
+        return "config-if-vlan"
+    if interface.startswith("lag"):
+        return "config-lag-if"
+    if "-" in interface or "," in interface:
+        return f"config-if-<{interface}>"
+    return "config-if"
+
+
+def get_sysname(config: str) -> str:
+    for line in config.splitlines():
+        if line.strip().startswith("sysname "):
+            return line.strip()[8:]
+    return "HPE"
+
+
+# Writes an inventory the collector reads, one "name host:port" line per target
+def write_inventory(file_name: str, targets: list):
+    with open(file_name, "w") as inventory_file:
+        for name, host, port in targets:
+            inventory_file.write(f"{name} {host}:{port}\n")
+
+
+async def run_fake_devices(
+    source: str, inventory_name: str, host: str = "127.0.0.1", **options
+):
+    server = Fake_Comware_Server(load_configs(source), **options)
+    targets = await server.start(host)
+    write_inventory(inventory_name, targets)
+    print(f"*{len(targets)} Fake Devices Listening, Inventory in {inventory_name}*")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+async def run_fake_switches(
+    names: list, inventory_name: str, host: str = "127.0.0.1", **options
+):
+    server = Fake_AOSCX_Server(names, **options)
+    targets = await server.start(host)
+    write_inventory(inventory_name, targets)
+    print(f"*{len(targets)} Fake Switches Listening, Inventory in {inventory_name}*")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        print(f"*{server.commands} Commands Received*")
+
+
+def serve_fake_switches(names: list, inventory_name: str, **options):
+    try:
+        asyncio.run(run_fake_switches(names, inventory_name, **options))
+    except KeyboardInterrupt:
+        pass
+    print("*Fake Switches Stopped*")
+
+
+def serve_fake_devices(source: str, inventory_name: str, **options):
+    try:
+        asyncio.run(run_fake_devices(source, inventory_name, **options))
+    except KeyboardInterrupt:
+        pass
+    print("*Fake Devices Stopped*")
@@ -0,0 +1,90 @@
+import json
+import struct
+from array import array
+
+from autoconfig.translator import Port_Table, Stack, Switch
+
+# Translated stacks as bytes, for the parse cache and for handing stacks between
+# processes. A packed stack is a JSON header with the stack's settings followed by
+# the raw Port_Table columns and switch rows, so packing never walks the ports
+CACHE_FORMAT = 4
+
+
+# Packs a translated (not yet rendered) stack as a JSON header and raw columns
+def pack_stack(stack: Stack) -> bytes:
+    table = stack.table
+    header = json.dumps(
+        {
+            "hostname": stack.hostname,
+            "ip_address": stack.ip_address,
+            "has_24_port": stack.has_24_port,
+            "secondary_member": stack.secondary_member,
+            "blade_map": list(stack.blade_map.items()),
+            "description_names": table.description_names[1:],
+            "switches": [
+                [switch.blade_number, len(switch.rows), switch.padding]
+                for switch in stack.switches
+            ],
+        }
+    ).encode()
+    rows = array("I")
+    for switch in stack.switches:
+        rows.extend(switch.rows)
+    columns = (
+        table.blade_numbers,
+        table.port_numbers,
+        table.vlans,
+        table.descriptions,
+    )
+    return b"".join(
+        [
+            struct.pack("<III", len(header), len(table), len(rows)),
+            header,
+            *(column.tobytes() for column in columns),
+            rows.tobytes(),
+        ]
+    )
+
+
+# Rebuilds a stack packed by pack_stack and returns it with the next offset
+def unpack_stack(data: bytes, offset: int = 0) -> tuple:
+    header_length, row_count, switch_row_count = struct.unpack_from(
+        "<III", data, offset
+    )
+    offset += 12
+    header = json.loads(data[offset : offset + header_length])
+    offset += header_length
+    table = Port_Table()
+    for column in (
+        table.blade_numbers,
+        table.port_numbers,
+        table.vlans,
+        table.descriptions,
+    ):
+        end = offset + row_count * column.itemsize
+        column.frombytes(data[offset:end])
+        offset = end
+    for description in header["description_names"]:
+        table.intern(description)
+    rows = array("I")
+    end = offset + switch_row_count * rows.itemsize
+    rows.frombytes(data[offset:end])
+    offset = end
+    switches = []
+    position = 0
+    for blade_number, length, padding in header["switches"]:
+        switch = Switch(blade_number, table)
+        switch.rows = rows[position : position + length]
+        switch.padding = [tuple(padding_range) for padding_range in padding]
+        switches.append(switch)
+        position += length
+    stack = Stack(
+        header["hostname"],
+        header["ip_address"],
+        switches,
+        header["has_24_port"],
+        header["secondary_member"],
+        table,
+    )
+    stack.blade_map = dict(header["blade_map"])
+    return (stack, offset)
@@ -0,0 +1,312 @@
+import os
+import queue
+import threading
+import time
+from functools import partial
+
+from autoconfig.packing import pack_stack, unpack_stack
+from autoconfig.policy import Policy
+from autoconfig.stats import STATS, Stats
+from autoconfig.translator import Translator, find_configs
+
+# Batch translation as four stages joined by bounded queues, so reading and
+# writing files overlap with translating them instead of taking turns in every
+# worker:
+#
+#   read     threads    the source file's text
+#   parse    processes  parse and apply the policy, packed stacks out
+#   render   processes  group, compress ranges and render, configuration text out
+#   write    threads    one output file per device
+#
+# Every stage takes jobs from its own queue and blocks once the next one is full,
+# so a slow disk holds back parsing rather than letting rendered text pile up in
+# memory. Stacks cross between processes packed, the way the parse cache stores
+# them, since a packed stack is far smaller to pickle than its port groups are to
+# rebuild. Queue depths are sampled while the pipeline runs: a stage with a full
+# queue in front of it is the bottleneck
+DEFAULT_QUEUE_SIZE = 16  # Jobs waiting in front of each stage
+DEFAULT_IO_THREADS = 2
+DEPTH_INTERVAL = 0.05  # Seconds between queue depth samples
+DONE = None  # Follows the last job through every queue
+
+
+class Job:
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.data = file_name  # What the last stage produced, the next one's input
+        self.error = None
+
+
+class Stage:
+    # Runs function over every job with threads threads, each waiting on its own
+    # call in executor when one is given
+    def __init__(
+        self,
+        name: str,
+        function,
+        threads: int = 1,
+        executor=None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.name = name
+        self.function = function
+        self.threads = threads
+        self.executor = executor
+        self.inbox = queue.Queue(queue_size)
+        self.outbox = None
+        self.lock = threading.Lock()
+        self.running = 0
+        self.jobs = 0
+        self.busy = 0.0  # Seconds spent on jobs, summed over threads
+        self.starved = 0.0  # Seconds waiting for a job
+        self.blocked = 0.0  # Seconds waiting for room in the next queue
+        self.depths = []  # Sampled inbox depths
+
+    def start(self, outbox: queue.Queue):
+        self.outbox = outbox
+        self.running = self.threads
+        for _ in range(self.threads):
+            threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        while True:
+            start = time.perf_counter()
+            job = self.inbox.get()
+            received = time.perf_counter()
+            if job is DONE:
+                self.inbox.put(DONE)  # For the other threads of this stage
+                break
+            if job.error is None:
+                try:
+                    if self.executor is None:
+                        job.data = self.function(job.data)
+                    else:
+                        future = self.executor.submit(self.function, job.data)
+                        job.data = future.result()
+                except Exception as error:
+                    job.error = error
+                    job.data = None
+            finished = time.perf_counter()
+            self.outbox.put(job)
+            with self.lock:
+                self.jobs += 1
+                self.starved += received - start
+                self.busy += finished - received
+                self.blocked += time.perf_counter() - finished
+        with self.lock:
+            self.running -= 1
+            last = self.running == 0
+        if last:
+            self.outbox.put(DONE)
+
+    def summary(self, elapsed: float) -> dict:
+        depths = self.depths or [0]
+        return {
+            "threads": self.threads,
+            "jobs": self.jobs,
+            "busy": self.busy,
+            "starved": self.starved,
+            "blocked": self.blocked,
+            "utilization": self.busy / (self.threads * elapsed) if elapsed else 0.0,
+            "queue_mean": sum(depths) / len(depths),
+            "queue_peak": max(depths),
+            "queue_size": self.inbox.maxsize,
+        }
+
+
+class Pipeline:
+    def __init__(self, stages: list, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.stages = stages
+        self.outbox = queue.Queue(queue_size)  # Finished jobs
+        self.elapsed = 0.0
+
+    # Returns the jobs waiting in front of every stage right now
+    def depths(self) -> dict:
+        return {stage.name: stage.inbox.qsize() for stage in self.stages}
+
+    def feed(self, file_names: list):
+        inbox = self.stages[0].inbox
+        for file_name in file_names:
+            inbox.put(Job(file_name))
+        inbox.put(DONE)
+
+    def monitor(self, stopped: threading.Event):
+        while not stopped.wait(DEPTH_INTERVAL):
+            for stage in self.stages:
+                stage.depths.append(stage.inbox.qsize())
+
+    # Yields every job, failed or not, as it leaves the last stage
+    def run(self, file_names: list):
+        outboxes = [stage.inbox for stage in self.stages[1:]] + [self.outbox]
+        for stage, outbox in zip(self.stages, outboxes):
+            stage.start(outbox)
+        stopped = threading.Event()
+        threading.Thread(target=self.monitor, args=(stopped,), daemon=True).start()
+        threading.Thread(target=self.feed, args=(file_names,), daemon=True).start()
+        start = time.perf_counter()
+        try:
+            while True:
+                job = self.outbox.get()
+                if job is DONE:
+                    break
+                yield job
+        finally:
+            stopped.set()
+            self.elapsed = time.perf_counter() - start
+
+    def summary(self) -> dict:
+        return {stage.name: stage.summary(self.elapsed) for stage in self.stages}
+
+    def report(self) -> str:
+        lines = [
+            f"{'stage':>7} {'threads':>7} {'busy':>8} {'starved':>8} {'blocked':>8} "
+            f"{'used':>5} {'queue':>11}"
+        ]
+        summary = self.summary()
+        for name, stage in summary.items():
+            lines.append(
+                f"{name:>7} {stage['threads']:>7} {stage['busy']:7.2f}s "
+                f"{stage['starved']:7.2f}s {stage['blocked']:7.2f}s "
+                f"{stage['utilization'] * 100:4.0f}% "
+                f"{stage['queue_mean']:4.1f}/{stage['queue_peak']:>2}/"
+                f"{stage['queue_size']}"
+            )
+        bottleneck = get_bottleneck(summary)
+        lines.append(f"*Bottleneck: {bottleneck} (queue is mean/peak/size)*")
+        return "\n".join(lines)
+
+
+# The stage furthest down the pipeline with a mostly full queue holds up every
+# stage before it. With no queue filling up, the busiest stage sets the pace
+def get_bottleneck(summary: dict) -> str:
+    for name in reversed(list(summary)):
+        stage = summary[name]
+        if stage["queue_mean"] > stage["queue_size"] / 2:
+            return name
+    return max(summary, key=lambda name: summary[name]["utilization"])
+
+
+def read_source(file_name: str) -> str:
+    with open(file_name, "r") as old_config_file:
+        return old_config_file.read()
+
+
+# Returns (packed stack, stats) for every device in a capture
+def parse_source(text: str, policy: Policy) -> list:
+    stacks = [
+        (pack_stack(stack), stack.stats.as_dict())
+        for stack in Translator(policy).iter_stacks(text.splitlines(True))
+    ]
+    if not stacks:
+        raise ValueError("No device configuration found")
+    return stacks
+
+
+# Returns (hostname, configuration, stats) for every packed stack
+def render_stacks(stacks: list) -> list:
+    configurations = []
+    for data, device in stacks:
+        stack, _ = unpack_stack(data)
+        stack.stats.lines = device["lines"]
+        stack.stats.seconds["parse"] = device["seconds"]["parse"]
+        configuration = "".join(stack.get_configuration())
+        configurations.append((stack.hostname, configuration, stack.stats.as_dict()))
+    return configurations
+
+
+# Writes every configuration and returns the finished stats of each device
+def write_configurations(configurations: list, output_directory: str) -> list:
+    device_stats = []
+    for hostname, configuration, device in configurations:
+        start = time.perf_counter()
+        config_name = os.path.join(output_directory, f"{hostname}.txt")
+        with open(config_name, "w") as config_file:
+            config_file.write(configuration)
+        device["bytes"] = len(configuration)
+        device["seconds"]["write"] = time.perf_counter() - start
+        device_stats.append(device)
+    return device_stats
+
+
+# Returns the read, parse, render and write stages. A thread per worker in each
+# process stage keeps every worker busy without queueing more than one job per
+# worker in the pool itself
+def get_stages(
+    executor,
+    output_directory: str,
+    policy: Policy,
+    workers: int,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    io_threads: int = DEFAULT_IO_THREADS,
+) -> list:
+    return [
+        Stage("read", read_source, io_threads, queue_size=queue_size),
+        Stage(
+            "parse",
+            partial(parse_source, policy=policy),
+            workers,
+            executor,
+            queue_size,
+        ),
+        Stage("render", render_stacks, workers, executor, queue_size),
+        Stage(
+            "write",
+            partial(write_configurations, output_directory=output_directory),
+            io_threads,
+            queue_size=queue_size,
+        ),
+    ]
+
+
+# Translates every config in a directory or glob through the staged pipeline
+def pipeline_translate(
+    source: str,
+    output_directory: str = ".",
+    policy: Policy = None,
+    workers: int = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    io_threads: int = DEFAULT_IO_THREADS,
+):
+    from concurrent.futures import ProcessPoolExecutor
+
+    policy = policy or Policy()
+    workers = workers or os.cpu_count() or 1
+    file_names = find_configs(source)
+    os.makedirs(output_directory, exist_ok=True)
+    results = []
+    batch_stats = Stats()
+    devices = []
+    port_total = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        stages = get_stages(
+            executor, output_directory, policy, workers, queue_size, io_threads
+        )
+        pipeline = Pipeline(stages, queue_size)
+        for job in pipeline.run(file_names):
+            if job.error is not None:
+                error = job.error
+                print(f"*Failed* {job.file_name}: {type(error).__name__}: {error}")
+                results.append((job.file_name, None, error))
+                continue
+            hostnames = [device["hostname"] for device in job.data]
+            outputs = ", ".join(f"{hostname}.txt" for hostname in hostnames)
+            print(f"*Translated* {job.file_name} -> {outputs}")
+            results.append((job.file_name, hostnames, None))
+            for device in job.data:
+                STATS.add(device)
+                batch_stats.add(device)
+                devices.append(dict(device, source=job.file_name))
+                port_total += device["ports"]
+    stats_name = os.path.join(output_directory, "batch_stats.json")
+    batch_stats.dump(stats_name, devices)
+    elapsed = pipeline.elapsed
+    failed = sum(1 for result in results if result[2] is not None)
+    rate = len(devices) / elapsed if elapsed > 0 else 0.0
+    print(
+        f"*{len(results) - failed} Files Translated, {failed} Failed in "
+        f"{elapsed:.2f}s ({len(devices)} devices, {rate:.1f} devices/s, "
+        f"{port_total} ports)*"
+    )
+    print(pipeline.report())
+    print(f"*Stats Written to {stats_name}*")
+    return results
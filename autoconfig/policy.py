@@ -0,0 +1,106 @@
+import json
+from fnmatch import fnmatchcase
+
+from autoconfig.descriptions import Description_Filter
+
+# Answers the translator would otherwise prompt for, read once from a JSON file:
+#
+# {
+#     "default": {"has_24_port": false, "upgrade_to_48": true},
+#     "overrides": {
+#         "ROB-*": {"has_24_port": true},
+#         "ROB-SW-012": {"upgrade_to_48": [3], "remap": [2, 1, 3]}
+#     },
+#     "descriptions": [{"substring": "ap"}, {"word": "ruckus", "replace": "WAP"}]
+# }
+#
+# Glob overrides apply in file order, then an exact hostname override on top.
+# Description rules (see descriptions.py) replace each translator's built-in list.
+DEFAULT_ANSWERS = {
+    "has_24_port": False,  # Add a 24 port member after the last blade
+    "upgrade_to_48": False,  # true/false for every short blade, or a list of blades
+    "switch_count": None,  # 48 port members (V2), defaults to the blades found
+    "secondary_member": None,  # vsf secondary member, defaults to the last member
+    "remap": None,  # New member order, e.g. [2, 1, 3] makes blade 2 the first member
+}
+
+
+class Device_Policy:
+    def __init__(self, answers: dict):
+        self.has_24_port = bool(answers["has_24_port"])
+        self.upgrade_to_48 = answers["upgrade_to_48"]
+        self.switch_count = answers["switch_count"]
+        self.secondary_member = answers["secondary_member"]
+        self.remap = answers["remap"]
+
+    # Tests if a short blade should be padded out to 48 ports
+    def upgrades(self, blade_number: int) -> bool:
+        if isinstance(self.upgrade_to_48, list):
+            return blade_number in self.upgrade_to_48
+        return bool(self.upgrade_to_48)
+
+
+class Policy:
+    def __init__(
+        self, default: dict = None, overrides: dict = None, descriptions: list = None
+    ):
+        self.default = dict(DEFAULT_ANSWERS)
+        self.default.update(self.validate("default", default or {}))
+        self.exact_overrides = {}
+        self.glob_overrides = []
+        for pattern, answers in (overrides or {}).items():
+            answers = self.validate(pattern, answers)
+            if any(character in pattern for character in "*?["):
+                self.glob_overrides.append((pattern.upper(), answers))
+            else:
+                self.exact_overrides[pattern.upper()] = answers
+        self.resolved = {}
+        self.description_filter = None
+        if descriptions is not None:
+            self.description_filter = Description_Filter(descriptions)
+
+    @classmethod
+    def load(cls, file_name: str):
+        with open(file_name, "r") as policy_file:
+            policy = json.load(policy_file)
+        unknown = set(policy) - {"default", "overrides", "descriptions"}
+        if unknown:
+            raise ValueError(f"Unknown policy sections: {', '.join(sorted(unknown))}")
+        return cls(
+            policy.get("default"), policy.get("overrides"), policy.get("descriptions")
+        )
+
+    @staticmethod
+    def validate(name: str, answers: dict) -> dict:
+        unknown = set(answers) - set(DEFAULT_ANSWERS)
+        if unknown:
+            unknown = ", ".join(sorted(unknown))
+            raise ValueError(f"Unknown policy keys for {name}: {unknown}")
+        return answers
+
+    # Returns the merged answers for a hostname, resolved once per hostname
+    def for_hostname(self, hostname: str) -> Device_Policy:
+        hostname = (hostname or "").upper()
+        if hostname not in self.resolved:
+            answers = dict(self.default)
+            for pattern, override in self.glob_overrides:
+                if fnmatchcase(hostname, pattern):
+                    answers.update(override)
+            answers.update(self.exact_overrides.get(hostname, {}))
+            self.resolved[hostname] = Device_Policy(answers)
+        return self.resolved[hostname]
+
+    # Returns a stable summary of every answer, for cache keys
+    def fingerprint(self) -> str:
+        descriptions = None
+        if self.description_filter is not None:
+            descriptions = self.description_filter.to_list()
+        return json.dumps(
+            [
+                self.default,
+                sorted(self.exact_overrides.items()),
+                self.glob_overrides,
+                descriptions,
+            ],
+            sort_keys=True,
+        )
@@ -0,0 +1,128 @@
+import sqlite3
+
+from autoconfig.translator import get_building
+
+# SQLite index of every translated port in the fleet, so questions like "which
+# closets have ports in vlan 240" are index lookups instead of a grep over every
+# output file. Ports are stored as rendered, so blade is the vsf member number and
+# padded marks ports that were added to fill out a member
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stacks (
+    hostname TEXT PRIMARY KEY,
+    building TEXT NOT NULL,
+    ip_address TEXT,
+    uplink TEXT,
+    lag TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS ports (
+    hostname TEXT NOT NULL,
+    blade INTEGER NOT NULL,
+    port INTEGER NOT NULL,
+    vlan INTEGER,
+    description TEXT,
+    padded INTEGER NOT NULL,
+    PRIMARY KEY (hostname, blade, port)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS stacks_building ON stacks (building, hostname);
+CREATE INDEX IF NOT EXISTS ports_vlan ON ports (vlan, hostname);
+CREATE INDEX IF NOT EXISTS ports_description ON ports (description, hostname);
+CREATE INDEX IF NOT EXISTS ports_unused ON ports (hostname)
+    WHERE vlan IS NULL AND description IS NULL;
+"""
+QUERIES = ("vlan", "description", "unused", "stack")
+
+
+class Port_Database:
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.connection = sqlite3.connect(file_name)
+        # Readers keep querying while a batch writes, and a crash loses at most
+        # the batch in progress
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    # Replaces the rows of every stack in records, which are Stack.get_record()
+    # tuples. A concatenated capture can hold a hostname twice, and like its
+    # output file the last one wins. Nothing is visible to readers until commit,
+    # and a failed call leaves the database as it was before it
+    def add_stacks(self, records: list, source: str = None):
+        records = list({record[0]: record for record in records}.values())
+        cursor = self.connection.cursor()
+        # The savepoint must sit inside a transaction, or releasing it commits
+        if not self.connection.in_transaction:
+            cursor.execute("BEGIN")
+        cursor.execute("SAVEPOINT add_stacks")
+        try:
+            hostnames = [(record[0],) for record in records]
+            cursor.executemany("DELETE FROM ports WHERE hostname = ?", hostnames)
+            cursor.executemany(
+                "INSERT OR REPLACE INTO stacks VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (hostname, get_building(hostname), ip_address, uplink, lag, source)
+                    for hostname, ip_address, uplink, lag, _ in records
+                ),
+            )
+            for hostname, _, _, _, ports in records:
+                cursor.executemany(
+                    "INSERT INTO ports VALUES (?, ?, ?, ?, ?, ?)",
+                    ((hostname, *port) for port in ports),
+                )
+        except sqlite3.Error:
+            cursor.execute("ROLLBACK TO add_stacks")
+            raise
+        finally:
+            cursor.execute("RELEASE add_stacks")
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    # Returns (hostname, ports) for every stack with access ports in a vlan
+    def ports_in_vlan(self, vlan: int) -> list:
+        return self.connection.execute(
+            "SELECT hostname, COUNT(*) FROM ports WHERE vlan = ? GROUP BY hostname",
+            (vlan,),
+        ).fetchall()
+
+    # Returns (hostname, blade, port) for every port with a description
+    def ports_with_description(self, description: str) -> list:
+        return self.connection.execute(
+            "SELECT hostname, blade, port FROM ports WHERE description = ? "
+            "ORDER BY hostname, blade, port",
+            (description,),
+        ).fetchall()
+
+    # Returns (building, stacks, ports) with neither a vlan nor a description
+    def unused_ports(self) -> list:
+        return self.connection.execute(
+            "SELECT building, COUNT(DISTINCT hostname), COUNT(*) FROM ports "
+            "JOIN stacks USING (hostname) "
+            "WHERE vlan IS NULL AND description IS NULL "
+            "GROUP BY building ORDER BY building"
+        ).fetchall()
+
+    # Returns (hostname, ip address, uplink, lag, source) of one stack
+    def stack(self, hostname: str) -> list:
+        return self.connection.execute(
+            "SELECT hostname, ip_address, uplink, lag, source FROM stacks "
+            "WHERE hostname = ?",
+            (hostname,),
+        ).fetchall()
+
+    # Runs a query by name, e.g. query("vlan", "240")
+    def query(self, name: str, argument: str = None) -> list:
+        if argument is None and name in ("vlan", "description", "stack"):
+            raise ValueError(f"The {name} query needs an argument")
+        if name == "vlan":
+            return self.ports_in_vlan(int(argument))
+        if name == "description":
+            return self.ports_with_description(argument)
+        if name == "unused":
+            return self.unused_ports()
+        if name == "stack":
+            return self.stack(argument.upper())
+        raise ValueError(f"Unknown query {name}, expected one of {', '.join(QUERIES)}")
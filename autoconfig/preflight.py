@@ -0,0 +1,140 @@
+import time
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+from autoconfig.translator import (
+    LINE_RULES,
+    Device,
+    Translator,
+    find_configs,
+    get_building,
+)
+
+# Checks a whole fleet before translating it for devices that would collide: two
+# sources normalizing to one hostname (the second output overwrites the first),
+# one management IP used twice, or a device holding its own derived gateway or
+# the network or broadcast address. Management subnets shared by different
+# buildings are listed too, but only as a note: every stack renders a /16 routed
+# through .0.1, so buildings often share one. Every check is a hash lookup or one
+# sweep over the devices sorted by subnet, so a fleet never costs pairwise
+# comparisons
+PREFIX_LENGTH = 16  # Stack.iter_configuration always renders a /16
+MASK = (0xFFFFFFFF << 32 - PREFIX_LENGTH) & 0xFFFFFFFF
+
+# Only the lines preflight needs, so interfaces are skipped after one lookup
+PREFLIGHT_RULES = {token: LINE_RULES[token] for token in ("sysname", "ip", "return")}
+
+
+# Returns (hostname, ip address, source) for every device in a file
+def scan_file(file_name: str, rules: dict = PREFLIGHT_RULES) -> list:
+    translator = Translator(rules=rules)
+    with open(file_name, "r") as old_config_file:
+        return [
+            (item.hostname, item.ip_address, file_name)
+            for item in translator.parse(old_config_file)
+            if isinstance(item, Device)
+        ]
+
+
+def scan_fleet(file_names: list, workers: int = None) -> list:
+    if workers == 1 or len(file_names) < 2:
+        return [device for name in file_names for device in scan_file(name)]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = executor.map(scan_file, file_names, chunksize=64)
+        return [device for chunk in chunks for device in chunk]
+
+
+def ip_to_int(ip_address: str) -> int:
+    first, second, third, fourth = (int(octet) for octet in ip_address.split("."))
+    return first << 24 | second << 16 | third << 8 | fourth
+
+
+def int_to_ip(value: int) -> str:
+    return ".".join(str(value >> shift & 255) for shift in (24, 16, 8, 0))
+
+
+class Preflight_Report:
+    def __init__(self):
+        self.devices = 0
+        self.duplicate_hostnames = []  # (hostname, sources)
+        self.duplicate_addresses = []  # (ip address, hostnames)
+        self.gateway_conflicts = []  # (hostname, ip address), the gateway itself
+        self.invalid_addresses = []  # (hostname, ip address or None, source)
+        self.shared_subnets = []  # (subnet, buildings), not counted as a conflict
+        self.subnets = 0
+        self.seconds = 0.0
+
+    @property
+    def conflicts(self) -> int:
+        return (
+            len(self.duplicate_hostnames)
+            + len(self.duplicate_addresses)
+            + len(self.gateway_conflicts)
+            + len(self.invalid_addresses)
+        )
+
+    def report(self) -> str:
+        lines = []
+        for hostname, sources in self.duplicate_hostnames:
+            lines.append(f"Hostname {hostname} comes from {', '.join(sources)}")
+        for ip_address, hostnames in self.duplicate_addresses:
+            lines.append(f"Address {ip_address} is used by {', '.join(hostnames)}")
+        for hostname, ip_address in self.gateway_conflicts:
+            lines.append(f"{hostname} uses its own gateway address {ip_address}")
+        for hostname, ip_address, source in self.invalid_addresses:
+            lines.append(f"{hostname} in {source} has no usable address: {ip_address}")
+        for subnet, buildings in self.shared_subnets:
+            lines.append(f"Note: subnet {subnet} is shared by {', '.join(buildings)}")
+        lines.append(
+            f"*{self.devices} Devices in {self.subnets} Subnets, "
+            f"{self.conflicts} Conflicts Found in {self.seconds * 1000:.1f}ms*"
+        )
+        return "\n".join(lines)
+
+
+# Finds every conflict among (hostname, ip address, source) device records
+def check_devices(devices: list) -> Preflight_Report:
+    start = time.perf_counter()
+    report = Preflight_Report()
+    report.devices = len(devices)
+    sources = defaultdict(list)
+    hostnames_by_address = defaultdict(list)
+    networks = []
+    for hostname, ip_address, source in devices:
+        sources[hostname].append(source)
+        try:
+            address = ip_to_int(ip_address)
+        except (AttributeError, ValueError):
+            report.invalid_addresses.append((hostname, ip_address, source))
+            continue
+        hostnames_by_address[address].append(hostname)
+        network = address & MASK
+        # Stack.iter_configuration routes through .0.1 of the first two octets
+        gateway = network | 1
+        if address == network or address == network | ~MASK & 0xFFFFFFFF:
+            report.invalid_addresses.append((hostname, ip_address, source))
+        elif address == gateway:
+            report.gateway_conflicts.append((hostname, ip_address))
+        networks.append((network, get_building(hostname)))
+    for hostname, hostname_sources in sources.items():
+        if len(hostname_sources) > 1:
+            report.duplicate_hostnames.append((hostname, hostname_sources))
+    for address, hostnames in hostnames_by_address.items():
+        if len(hostnames) > 1:
+            report.duplicate_addresses.append((int_to_ip(address), hostnames))
+    networks.sort()
+    for network, members in groupby(networks, key=itemgetter(0)):
+        report.subnets += 1
+        buildings = sorted({building for _, building in members})
+        if len(buildings) > 1:
+            subnet = f"{int_to_ip(network)}/{PREFIX_LENGTH}"
+            report.shared_subnets.append((subnet, buildings))
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def preflight(source: str, workers: int = None) -> Preflight_Report:
+    return check_devices(scan_fleet(find_configs(source), workers))
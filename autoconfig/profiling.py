@@ -0,0 +1,226 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+# Opt-in deep profiling for translate and batch. Nothing here is imported unless
+# --profile is given, so an ordinary run pays nothing for it. Two profilers:
+#
+#   cprofile   every call, deterministic, slows the run down by about 2x
+#   sample     the running stack every millisecond from a thread, close to full
+#              speed, for runs where cProfile's overhead skews the picture
+#
+# A run writes <prefix>.collapsed, one "frame;frame;frame count" line per stack
+# for flamegraph.pl, speedscope or inferno, <prefix>.txt with the top functions
+# of each phase, and for cProfile <prefix>.pstats. A phase is the innermost
+# translator function on the stack that starts one, so get_interface_runs
+# called while writing counts as ranges, not write
+MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL = 0.001
+TOP_FUNCTIONS = 8
+PHASE_FUNCTIONS = {
+    "parse": "parse",
+    "iter_stacks": "parse",
+    "build_stack": "group",
+    "sort": "group",
+    "get_index": "group",
+    "get_interface_runs": "ranges",
+    "iter_configuration": "render",
+    "get_configuration": "render",
+    "render": "render",
+    "write_configuration": "write",
+}
+
+
+# Samples the stack of the thread that started it while active is set
+class Sampler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.thread = None
+        self.running = False
+        self.active = True
+
+    def start(self):
+        self.target = threading.get_ident()
+        self.switch_interval = sys.getswitchinterval()
+        # The sampler only runs when the GIL is handed over, which is every 5ms
+        # by default
+        sys.setswitchinterval(self.interval / 2)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            frame = sys._current_frames().get(self.target) if self.active else None
+            if frame is not None:
+                self.stacks[collapse_frame(frame)] += 1
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        sys.setswitchinterval(self.switch_interval)
+
+
+def get_label(name: str, file_name: str, line_number: int) -> str:
+    if file_name == "~":  # A builtin, already named like <built-in method ...>
+        return name
+    return f"{name} ({os.path.basename(file_name)}:{line_number})"
+
+
+def collapse_frame(frame) -> str:
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        labels.append(get_label(code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+# Rebuilds stacks from cProfile's caller graph. Each function's own time is split
+# over the paths that reach it in proportion to the time spent through each
+# caller, which is exact for a tree and a fair estimate where paths merge
+def collapse_stats(stats: pstats.Stats) -> Counter:
+    callees = defaultdict(list)
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees[caller].append((function, edge[3]))
+    stacks = Counter()
+
+    def walk(function: tuple, path: str, share: float, seen: set):
+        _, _, own_time, total_time, _ = stats.stats[function]
+        file_name, line_number, name = function
+        label = get_label(name, file_name, line_number)
+        path = f"{path};{label}" if path else label
+        microseconds = int(own_time * share * 1e6)
+        if microseconds:
+            stacks[path] += microseconds
+        for callee, edge_time in callees.get(function, ()):
+            callee_time = stats.stats[callee][3]
+            callee_share = share * edge_time / callee_time if callee_time else 0.0
+            if callee in seen or callee_share * callee_time < 1e-6:
+                continue
+            seen.add(callee)
+            walk(callee, path, callee_share, seen)
+            seen.discard(callee)
+
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            walk(function, "", 1.0, {function})
+    return stacks
+
+
+# Returns {phase: (total, Counter of leaf function totals)} from collapsed stacks
+def group_by_phase(stacks: Counter) -> dict:
+    phases = {}
+    for stack, count in stacks.items():
+        labels = stack.split(";")
+        phase = "other"
+        for label in reversed(labels):
+            name, _, location = label.partition(" (")
+            if location.startswith("translator.py") and name in PHASE_FUNCTIONS:
+                phase = PHASE_FUNCTIONS[name]
+                break
+        total, functions = phases.get(phase, (0, Counter()))
+        functions[labels[-1]] += count
+        phases[phase] = (total + count, functions)
+    return phases
+
+
+def format_summary(stacks: Counter, mode: str, top: int = TOP_FUNCTIONS) -> str:
+    grand_total = sum(stacks.values()) or 1
+    unit = "samples" if mode == "sample" else "us"
+    lines = [f"*Profile ({mode}): {grand_total} {unit}*"]
+    phases = group_by_phase(stacks)
+    for phase, (total, functions) in sorted(
+        phases.items(), key=lambda item: item[1][0], reverse=True
+    ):
+        lines.append(f"{phase:>7}: {total / grand_total * 100:5.1f}%")
+        for label, count in functions.most_common(top):
+            lines.append(f"         {count / grand_total * 100:5.1f}%  {label}")
+    return "\n".join(lines)
+
+
+def write_collapsed(file_name: str, stacks: Counter):
+    with open(file_name, "w") as collapsed_file:
+        for stack, count in sorted(stacks.items()):
+            collapsed_file.write(f"{stack} {count}\n")
+
+
+def write_outputs(prefix: str, mode: str, stacks: Counter, stats=None) -> str:
+    if stats is not None:
+        stats.dump_stats(f"{prefix}.pstats")
+    write_collapsed(f"{prefix}.collapsed", stacks)
+    summary = format_summary(stacks, mode)
+    with open(f"{prefix}.txt", "w") as summary_file:
+        summary_file.write(summary + "\n")
+    return summary
+
+
+# Runs function(*arguments) under a profiler, writes the outputs and returns the
+# function's result
+def profile_call(mode: str, prefix: str, function, *arguments, **options):
+    if mode == "sample":
+        sampler = Sampler()
+        sampler.start()
+        try:
+            return function(*arguments, **options)
+        finally:
+            sampler.stop()
+            print(write_outputs(prefix, mode, sampler.stacks))
+            print(f"*Profile Written to {prefix}.collapsed and .txt*")
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *arguments, **options)
+    finally:
+        stats = pstats.Stats(profiler)
+        print(write_outputs(prefix, mode, collapse_stats(stats), stats))
+        print(f"*Profile Written to {prefix}.pstats, .collapsed and .txt*")
+
+
+# Per worker process state: batch workers profile every file they translate into
+# one profile, rewritten after each file since a pool worker has no exit hook. A
+# worker's sampler runs for the worker's life and only records inside a file
+worker_profile = None
+
+
+def profile_in_worker(mode: str, directory: str, function, *arguments):
+    global worker_profile
+    if worker_profile is None:
+        worker_profile = cProfile.Profile() if mode == "cprofile" else Sampler()
+        if mode == "sample":
+            worker_profile.active = False
+            worker_profile.start()
+    name = os.path.join(directory, f"worker-{os.getpid()}")
+    if mode == "sample":
+        worker_profile.active = True
+        try:
+            return function(*arguments)
+        finally:
+            worker_profile.active = False
+            write_collapsed(f"{name}.collapsed", worker_profile.stacks.copy())
+    try:
+        return worker_profile.runcall(function, *arguments)
+    finally:
+        worker_profile.dump_stats(f"{name}.pstats")
+
+
+# Merges every worker's profile in a directory and writes the batch outputs
+def merge_worker_profiles(mode: str, directory: str, prefix: str) -> str:
+    names = [os.path.join(directory, name) for name in sorted(os.listdir(directory))]
+    if mode == "cprofile":
+        stats = pstats.Stats(*names) if names else None
+        stacks = collapse_stats(stats) if stats is not None else Counter()
+        return write_outputs(prefix, mode, stacks, stats)
+    stacks = Counter()
+    for name in names:
+        with open(name, "r") as collapsed_file:
+            for line in collapsed_file:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                stacks[stack] += int(count)
+    return write_outputs(prefix, mode, stacks)
@@ -0,0 +1,263 @@
+import asyncio
+import os
+import re
+import time
+
+from autoconfig.collector import Target, load_inventory
+
+# Sends generated configurations to many AOS-CX switches at once instead of
+# pasting each file into a console by hand. Every switch gets one session and a
+# pipelined command stream: up to `window` commands are in flight before the
+# first prompt comes back, so a session costs a round trip per window rather
+# than per line. Sessions share a global limit on open connections and a token
+# bucket on commands per second, and every command's output is kept so a switch
+# that rejected a line can be found afterwards.
+#
+# Like the collector, the switch side is a transport with one async method,
+# "push(target, result, engine)" that fills result.outputs with one entry per
+# command. fake_devices.Fake_AOSCX_Server answers TCP_Push_Transport offline and
+# records everything it received
+DEFAULT_CONNECTIONS = 32
+DEFAULT_WINDOW = 64  # Commands sent ahead of the prompts that acknowledge them
+DEFAULT_TIMEOUT = 120.0
+PROMPT_END = b"# "
+# Any context, e.g. switch(config-if-<1/1/1-1/1/48,2/1/1>)# for an interface range
+PROMPT = re.compile(r"[^\s()]+(\([^)]*\))?# $")
+ERROR_MARKERS = ("Invalid input", "% ", "Error")  # At the start of an output line
+SESSION_ERRORS = (OSError, EOFError, asyncio.TimeoutError, asyncio.LimitOverrunError)
+
+
+class Rate_Limiter:
+    # Allows rate tokens per second with bursts of up to burst tokens. A rate of
+    # None never waits
+    def __init__(self, rate: float = None, burst: int = DEFAULT_WINDOW):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = None
+        self.lock = None
+        self.waited = 0.0  # Seconds callers spent in acquire, queueing included
+
+    async def acquire(self, tokens: int = 1):
+        if self.rate is None:
+            return
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        # The lock keeps waiters in order, so a large request is never starved
+        async with self.lock:
+            now = loop.time()
+            if self.updated is not None:
+                elapsed = now - self.updated
+                self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            if self.tokens < 0:
+                await asyncio.sleep(-self.tokens / self.rate)
+        self.waited += loop.time() - start
+
+
+class Push_Result:
+    def __init__(self, target: Target, commands: list):
+        self.target = target
+        self.commands = commands
+        self.outputs = []  # Output of each command in order, as the switch printed it
+        self.error = None
+        self.seconds = 0.0
+        self.window_waits = 0.0  # Seconds the sender waited on unacknowledged commands
+
+    @property
+    def rejected(self) -> list:
+        return [
+            (command, output)
+            for command, output in zip(self.commands, self.outputs)
+            if is_error(command, output)
+        ]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.rejected
+
+
+# Tests if the output of a command reports an error. The echo of the command comes
+# first and is skipped, so "description 100% Lab" is not an error
+def is_error(command: str, output: str) -> bool:
+    lines = output.splitlines()
+    if lines and lines[0].strip() == command.strip():
+        lines = lines[1:]
+    return any(line.lstrip().startswith(ERROR_MARKERS) for line in lines)
+
+
+# Returns the command lines of a rendered configuration, wrapped for config mode
+def get_push_commands(configuration: list, save: bool = False) -> list:
+    commands = ["configure terminal"]
+    for block in configuration:
+        commands.extend(line for line in block.splitlines() if line.strip())
+    commands.append("end")
+    if save:
+        commands.append("write memory")
+    return commands
+
+
+# Reads up to the next prompt and returns the output before it. A "# " inside the
+# output is kept reading past, since it is not at the end of a prompt line
+async def read_prompt(reader) -> str:
+    output = ""
+    while True:
+        output += (await reader.readuntil(PROMPT_END)).decode("utf-8", "replace")
+        output, _, last_line = output.rpartition("\n")
+        if PROMPT.fullmatch(last_line.lstrip("\r")):
+            return output.strip()
+        output = f"{output}\n{last_line}"
+
+
+class TCP_Push_Transport:
+    # Sends commands while a second coroutine reads one prompt per command, with
+    # at most window commands unacknowledged
+    async def push(self, target: Target, result: Push_Result, engine):
+        reader, writer = await asyncio.open_connection(target.host, target.port)
+        try:
+            await reader.readuntil(PROMPT_END)  # The login prompt
+            window = asyncio.Semaphore(engine.window)
+
+            async def send():
+                for command in result.commands:
+                    if window.locked():
+                        start = time.perf_counter()
+                        await window.acquire()
+                        result.window_waits += time.perf_counter() - start
+                    else:
+                        await window.acquire()
+                    await engine.limiter.acquire()
+                    writer.write(f"{command}\n".encode())
+                    await writer.drain()
+
+            async def receive():
+                for _ in result.commands:
+                    output = await read_prompt(reader)
+                    result.outputs.append(output)
+                    window.release()
+
+            sender = asyncio.ensure_future(send())
+            try:
+                await receive()
+                await sender
+            finally:
+                sender.cancel()
+        finally:
+            writer.close()
+
+
+class Push_Engine:
+    def __init__(
+        self,
+        transport=None,
+        connections: int = DEFAULT_CONNECTIONS,
+        rate: float = None,
+        window: int = DEFAULT_WINDOW,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.transport = transport or TCP_Push_Transport()
+        self.connections = connections
+        self.limiter = Rate_Limiter(rate, window)
+        self.window = window
+        self.timeout = timeout
+        self.slots = None
+        self.open_connections = 0
+        self.peak_connections = 0
+        self.connection_waits = 0.0  # Seconds switches queued for a connection slot
+
+    async def push_target(self, target: Target, commands: list) -> Push_Result:
+        result = Push_Result(target, commands)
+        queued = time.perf_counter()
+        async with self.slots:
+            start = time.perf_counter()
+            self.connection_waits += start - queued
+            self.open_connections += 1
+            self.peak_connections = max(self.peak_connections, self.open_connections)
+            try:
+                await asyncio.wait_for(
+                    self.transport.push(target, result, self), self.timeout
+                )
+            except SESSION_ERRORS as error:
+                result.error = error
+            finally:
+                self.open_connections -= 1
+            result.seconds = time.perf_counter() - start
+        return result
+
+    # Takes (target, commands) pairs and yields a Push_Result as each finishes
+    async def push(self, jobs: list):
+        self.slots = asyncio.Semaphore(self.connections)
+        tasks = [
+            asyncio.ensure_future(self.push_target(target, commands))
+            for target, commands in jobs
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+# Reads every generated configuration an inventory names, as <name>.txt in the
+# config directory, into (target, commands) jobs
+def load_jobs(inventory_name: str, config_directory: str, save: bool = False) -> list:
+    jobs = []
+    for target in load_inventory(inventory_name):
+        config_name = os.path.join(config_directory, f"{target.name}.txt")
+        with open(config_name, "r") as config_file:
+            jobs.append((target, get_push_commands(config_file, save)))
+    return jobs
+
+
+async def run_push(engine: Push_Engine, jobs: list) -> list:
+    results = []
+    async for result in engine.push(jobs):
+        results.append(result)
+        if result.error is not None:
+            error = result.error
+            print(f"*Failed* {result.target}: {type(error).__name__}: {error}")
+            continue
+        rejected = result.rejected
+        print(
+            f"*{'Pushed' if not rejected else 'Rejected'}* {result.target}: "
+            f"{len(result.commands)} commands in {result.seconds:.2f}s"
+        )
+        for command, output in rejected:
+            print(f"  {command}: {output}")
+    return results
+
+
+# Pushes the generated configuration of every switch in an inventory
+def push_configs(
+    inventory_name: str,
+    config_directory: str = ".",
+    connections: int = DEFAULT_CONNECTIONS,
+    rate: float = None,
+    window: int = DEFAULT_WINDOW,
+    save: bool = False,
+    transport=None,
+) -> list:
+    jobs = load_jobs(inventory_name, config_directory, save)
+    engine = Push_Engine(transport, connections, rate, window)
+    start = time.perf_counter()
+    results = asyncio.run(run_push(engine, jobs))
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for result in results if not result.ok)
+    commands = sum(len(result.outputs) for result in results)
+    rate = commands / elapsed if elapsed > 0 else 0.0
+    window_waits = sum(result.window_waits for result in results)
+    print(
+        f"*{len(results) - failed} Switches Configured, {failed} Failed in "
+        f"{elapsed:.2f}s ({commands} commands, {rate:.0f} commands/s, "
+        f"{engine.peak_connections} connections at peak)*"
+    )
+    print(
+        f"*Waited {engine.connection_waits:.2f}s for Connections, "
+        f"{engine.limiter.waited:.2f}s on the Rate Limit and "
+        f"{window_waits:.2f}s on Full Windows*"
+    )
+    return results
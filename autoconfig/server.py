@@ -0,0 +1,296 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from autoconfig.policy import Policy
+from autoconfig.stats import Stats
+from autoconfig.translator import Translator
+
+# Long running translation server for callers that would otherwise start a new
+# interpreter per device. Speaks plain HTTP/1.1 on localhost or a Unix socket:
+#
+#   POST /translate[?order=2,1,3]   body is a Comware configuration, answers
+#                                   {"devices": [{"hostname", "configuration"}]}
+#   GET /stats                      server counters and per phase timings
+#
+# Requests that arrive together are handed to the worker pool as one batch, and
+# every worker keeps its Translator and policy for its whole life
+DEFAULT_ADDRESS = "127.0.0.1:8731"
+BATCH_SIZE = 32
+BATCH_WINDOW = 0.002  # Seconds to wait for more requests before a batch is sent
+CACHE_ENTRIES = 4096
+BACKLOG = 1024
+MAX_BODY = 16 * 1024 * 1024
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Too Large",
+    500: "Internal Server Error",
+}
+
+translator = None
+
+
+def init_worker(policy: Policy):
+    global translator
+    translator = Translator(policy)
+
+
+# Translates every (source, order) pair of a batch inside a worker. A request
+# that fails gets its own error, so it never fails the requests batched with it
+def translate_batch(requests: list) -> list:
+    results = []
+    for source, order in requests:
+        try:
+            devices = []
+            for stack in translator.iter_stacks(source.splitlines(keepends=True)):
+                configuration = "".join(stack.get_configuration(order))
+                devices.append(
+                    {
+                        "hostname": stack.hostname,
+                        "configuration": configuration,
+                        "stats": stack.stats.as_dict(),
+                    }
+                )
+            if not devices:
+                raise ValueError("No device configuration found")
+            results.append({"devices": devices})
+        except ValueError as error:
+            results.append({"error": str(error)})
+        except Exception as error:
+            results.append({"error": f"{type(error).__name__}: {error}"})
+    return results
+
+
+# Parses "host:port" or a Unix socket path
+def parse_address(address: str) -> tuple:
+    if "/" in address or address.endswith(".sock"):
+        return (address, None)
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+class Translation_Server:
+    def __init__(self, policy: Policy = None, workers: int = None):
+        self.policy = policy or Policy()
+        self.workers = workers
+        self.executor = None
+        self.queue = None
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.stats = Stats()
+        self.requests = 0
+        self.batches = 0
+        self.cache_hits = 0
+
+    async def start(self, address: str = DEFAULT_ADDRESS):
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=init_worker, initargs=(self.policy,)
+        )
+        self.queue = asyncio.Queue()
+        self.batcher = asyncio.create_task(self.collect_batches())
+        host, port = parse_address(address)
+        if port is None:
+            self.server = await asyncio.start_unix_server(
+                self.handle, host, backlog=BACKLOG
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self.handle, host, port, backlog=BACKLOG
+            )
+        return self.server
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        self.executor.shutdown()
+
+    async def serve(self, address: str = DEFAULT_ADDRESS):
+        await self.start(address)
+        print(f"*Serving on {address}*")
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    # Returns the translation of a source from the cache, from an identical request
+    # already in flight or from the next batch
+    async def translate(self, source: str, order: list = None) -> dict:
+        self.requests += 1
+        key = hashlib.sha256(f"{order}:{source}".encode()).digest()
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return result
+        future = self.pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            future.add_done_callback(lambda done: self.finish(key, done))
+            self.pending[key] = future
+            await self.queue.put((source, order, future))
+        else:
+            self.cache_hits += 1
+        # One client hanging up must not cancel the others waiting on this future
+        return await asyncio.shield(future)
+
+    def finish(self, key: bytes, future: asyncio.Future):
+        del self.pending[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        if "error" in result:
+            return
+        for device in result["devices"]:
+            self.stats.add(device["stats"])
+        self.cache[key] = result
+        if len(self.cache) > CACHE_ENTRIES:
+            self.cache.popitem(last=False)
+
+    # Takes the first waiting request, gathers what arrives within the batch window
+    # and sends it to a worker without waiting for the previous batch
+    async def collect_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + BATCH_WINDOW
+            while len(batch) < BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            asyncio.create_task(self.run_batch(batch))
+
+    async def run_batch(self, batch: list):
+        requests = [(source, order) for source, order, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, translate_batch, requests
+            )
+        except Exception as error:
+            for _, _, future in batch:
+                future.set_exception(error)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def summary(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "cache_hits": self.cache_hits,
+            "cache_entries": len(self.cache),
+            "translation": self.stats.summary(),
+        }
+
+    # Serves HTTP requests on one connection until the client closes it
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "Body too large"})
+                    break
+                body = await reader.readexactly(length)
+                try:
+                    status, response = await self.route(method, target, body)
+                except ValueError as error:  # A bad order or a body that is not text
+                    status, response = (400, {"error": str(error)})
+                except Exception as error:  # Such as the worker pool breaking
+                    message = f"{type(error).__name__}: {error}"
+                    status, response = (500, {"error": message})
+                await self.respond(writer, status, response)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as error:  # A malformed request line or content length
+            with contextlib.suppress(ConnectionError):
+                await self.respond(writer, 400, {"error": str(error)})
+        finally:
+            writer.close()
+
+    async def route(self, method: str, target: str, body: bytes) -> tuple:
+        url = urlsplit(target)
+        if method == "GET" and url.path == "/stats":
+            return (200, self.summary())
+        if method != "POST" or url.path != "/translate":
+            return (404, {"error": f"No route for {method} {url.path}"})
+        order = parse_qs(url.query).get("order")
+        if order is not None:
+            order = [int(blade) for blade in order[0].split(",")]
+        result = await self.translate(body.decode(), order)
+        return (400 if "error" in result else 200, result)
+
+    @staticmethod
+    async def respond(writer, status: int, response: dict):
+        body = json.dumps(response).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+
+
+# Minimal client for local callers and benchmarks. Returns (status, response)
+async def post(
+    address: str, path: str, body: bytes = b"", method: str = "POST"
+) -> tuple:
+    host, port = parse_address(address)
+    if port is None:
+        reader, writer = await asyncio.open_unix_connection(host)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        response = json.loads(await reader.readexactly(length))
+        return (int(status_line.split()[1]), response)
+    finally:
+        writer.close()
+
+
+def serve(address: str = DEFAULT_ADDRESS, policy: Policy = None, workers: int = None):
+    start = time.perf_counter()
+    try:
+        asyncio.run(Translation_Server(policy, workers).serve(address))
+    except KeyboardInterrupt:
+        pass
+    print(f"*Server Stopped After {time.perf_counter() - start:.0f}s*")
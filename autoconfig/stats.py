@@ -0,0 +1,86 @@
+import json
+
+# Per-device timings and counters for the translation pipeline. Recording costs a
+# few perf_counter calls per device, never per line or per port, so it stays on
+PHASES = ("parse", "group", "ranges", "render", "write")
+
+
+class Device_Stats:
+    def __init__(self, hostname: str):
+        self.hostname = hostname
+        self.lines = 0
+        self.ports = 0
+        self.groups = 0
+        self.bytes = 0
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+
+    def as_dict(self) -> dict:
+        return {
+            "hostname": self.hostname,
+            "lines": self.lines,
+            "ports": self.ports,
+            "groups": self.groups,
+            "bytes": self.bytes,
+            "seconds": dict(self.seconds),
+        }
+
+
+# Running totals over every device recorded in this process
+class Stats:
+    def __init__(self):
+        self.devices = 0
+        self.lines = 0
+        self.ports = 0
+        self.groups = 0
+        self.bytes = 0
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.slowest = None
+
+    # Adds the dict of a Device_Stats, which is what batch workers send back
+    def add(self, device: dict):
+        self.devices += 1
+        self.lines += device["lines"]
+        self.ports += device["ports"]
+        self.groups += device["groups"]
+        self.bytes += device["bytes"]
+        for phase, seconds in device["seconds"].items():
+            self.seconds[phase] += seconds
+        total = sum(device["seconds"].values())
+        if self.slowest is None or total > self.slowest[1]:
+            self.slowest = (device["hostname"], total)
+
+    def summary(self) -> dict:
+        total = sum(self.seconds.values())
+        return {
+            "devices": self.devices,
+            "lines": self.lines,
+            "ports": self.ports,
+            "groups": self.groups,
+            "bytes": self.bytes,
+            "seconds": dict(self.seconds, total=total),
+            "slowest": self.slowest,
+        }
+
+    def report(self) -> str:
+        if not self.devices:
+            return "*No Devices Translated*"
+        total = sum(self.seconds.values())
+        lines = [
+            f"{self.devices} devices, {self.lines} lines, {self.ports} ports, "
+            f"{self.groups} groups, {self.bytes} bytes"
+        ]
+        for phase, seconds in self.seconds.items():
+            share = seconds / total * 100 if total else 0.0
+            per_device = seconds / self.devices * 1000
+            lines.append(
+                f"{phase:>7}: {seconds:8.3f}s {share:5.1f}% {per_device:8.3f}ms/device"
+            )
+        lines.append(f"slowest: {self.slowest[0]} ({self.slowest[1] * 1000:.3f}ms)")
+        return "\n".join(lines)
+
+    def dump(self, file_name: str, devices: list = None):
+        with open(file_name, "w") as stats_file:
+            json.dump({"summary": self.summary(), "devices": devices or []}, stats_file)
+
+
+STATS = Stats()
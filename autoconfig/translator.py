@@ -0,0 +1,797 @@
+import os
+import re
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from itertools import compress, count, repeat
+from operator import add, itemgetter, mul, ne, sub
+
+from autoconfig.descriptions import DEFAULT_RULES, Description_Filter
+from autoconfig.policy import Policy
+from autoconfig.stats import STATS, Device_Stats
+
+# Add 24 Port Configuration Functionality with AP mapping
+# Add remapping functionality
+
+
+# Column store for every port of a stack. A port is a row of four 16 bit columns
+# (vlan 0 and description 0 mean unset) and descriptions are interned per table
+class Port_Table:
+    def __init__(self):
+        self.blade_numbers = array("H")
+        self.port_numbers = array("H")
+        self.vlans = array("H")
+        self.descriptions = array("H")
+        self.description_names = [None]
+        self.description_ids = {}
+
+    def __len__(self) -> int:
+        return len(self.blade_numbers)
+
+    # Adds a port and returns its row
+    def append(
+        self,
+        blade_number: int,
+        port_number: int,
+        vlan_access: int = None,
+        description: str = None,
+    ) -> int:
+        self.blade_numbers.append(blade_number)
+        self.port_numbers.append(port_number)
+        self.vlans.append(vlan_access or 0)
+        self.descriptions.append(self.intern(description))
+        return len(self.blade_numbers) - 1
+
+    # Returns the id of a description, adding it on first use
+    def intern(self, description: str) -> int:
+        if description is None:
+            return 0
+        description_id = self.description_ids.get(description)
+        if description_id is None:
+            description_id = len(self.description_names)
+            self.description_names.append(description)
+            self.description_ids[description] = description_id
+        return description_id
+
+
+# A view of one row of a Port_Table
+class Port:
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: Port_Table, row: int):
+        self.table = table
+        self.row = row
+
+    @property
+    def blade_number(self) -> int:
+        return self.table.blade_numbers[self.row]
+
+    @property
+    def port_number(self) -> int:
+        return self.table.port_numbers[self.row]
+
+    @property
+    def location(self) -> str:
+        return f"{self.blade_number}/1/{self.port_number}"
+
+    @property
+    def vlan_access(self) -> int:
+        return self.table.vlans[self.row] or None
+
+    @property
+    def description(self) -> str:
+        return self.table.description_names[self.table.descriptions[self.row]]
+
+    # Changes the location of the port to a specified blade
+    def remap(self, new_blade_number: int):
+        self.table.blade_numbers[self.row] = new_blade_number
+
+
+# Splits the rows of every group into (blade, first port, last port) runs at once.
+# Rows are keyed as blade << 16 | port, so a run breaks wherever a key is not the
+# previous key + 1 and wherever a new group starts. Padding ranges only add their
+# first and last key, joined so the gap between them never breaks the run. A blade
+# map renders blades as other member numbers without touching the table
+def get_interface_runs(table: Port_Table, groups: list, blade_map: dict = None) -> list:
+    blade_numbers = table.blade_numbers
+    if blade_map and any(blade != member for blade, member in blade_map.items()):
+        members = list(range(max(blade_numbers, default=0) + 1))
+        for blade_number, member in blade_map.items():
+            if blade_number < len(members):
+                members[blade_number] = member
+        blade_numbers = map(members.__getitem__, blade_numbers)
+    else:
+        blade_map = {}
+    keys = list(map(add, map(mul, blade_numbers, repeat(0x10000)), table.port_numbers))
+    flat = []
+    joins = set()
+    group_ends = []
+    for group in groups:
+        position = 0
+        for padding_position, blade_number, first, last in group.padding:
+            flat.extend(map(keys.__getitem__, group.rows[position:padding_position]))
+            position = padding_position
+            key = blade_map.get(blade_number, blade_number) << 16
+            flat.append(key | first)
+            if last != first:
+                joins.add(len(flat))
+                flat.append(key | last)
+        rows = group.rows[position:] if position else group.rows
+        flat.extend(map(keys.__getitem__, rows))
+        group_ends.append(len(flat))
+    breaks = set(compress(count(1), map(ne, map(sub, flat[1:], flat), repeat(1))))
+    breaks.difference_update(joins)
+    breaks.update(group_ends)
+    breaks.discard(0)
+    boundaries = [0] + sorted(breaks)
+    runs = [[] for group in groups]
+    group = 0
+    for start, end in zip(boundaries, boundaries[1:]):
+        while group_ends[group] < end:
+            group += 1
+        first = flat[start]
+        runs[group].append((first >> 16, first & 0xFFFF, flat[end - 1] & 0xFFFF))
+    return runs
+
+
+# Returns the interface command for the runs of one group
+def format_interface_command(runs: list) -> str:
+    locations = []
+    for blade_number, start, end in runs:
+        if end - start < 2:  # Two ports in sequence will not get range notation
+            for port_number in range(start, end + 1):
+                locations.append(f"{blade_number}/1/{port_number}")
+        else:
+            locations.append(f"{blade_number}/1/{start}-{blade_number}/1/{end}")
+    return f"interface {','.join(locations)}\n"
+
+
+# Returns the interface command of every group from one run detection pass
+def get_interface_commands(
+    table: Port_Table, groups: list, blade_map: dict = None
+) -> list:
+    runs_by_group = get_interface_runs(table, groups, blade_map)
+    return [format_interface_command(runs) for runs in runs_by_group]
+
+
+# Rendered blocks keyed by what they are rendered from: the interface runs with
+# the group's vlan and description, an uplink location or a lag node. Most stacks
+# of a fleet render the same all-port, uplink and lag blocks, so each is built
+# once per process and every configuration holding it shares the one string.
+# The least recently used block is evicted past max_entries
+BLOCK_CACHE_ENTRIES = 4096
+
+
+class Block_Cache:
+    def __init__(self, max_entries: int = BLOCK_CACHE_ENTRIES):
+        self.blocks = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> str:
+        block = self.blocks.get(key)
+        if block is None:
+            self.misses += 1
+        else:
+            self.blocks.move_to_end(key)
+            self.hits += 1
+        return block
+
+    def put(self, key: tuple, block: str) -> str:
+        self.blocks[key] = block
+        if len(self.blocks) > self.max_entries:
+            self.blocks.popitem(last=False)
+        return block
+
+    def clear(self):
+        self.blocks.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+BLOCKS = Block_Cache()
+VANILLA_COMMANDS = (
+    "no shutdown\n",
+    "no routing\n",
+    "vlan trunk native 1\n",
+    "vlan trunk allowed 1,40,100,200,240\n\n",
+)
+UPLINK_COMMANDS = (
+    "description UPLINK to CORE\n",
+    "no shutdown\n" "no routing\n",
+    "vlan trunk native 1\n",
+    "vlan trunk allowed 1,40,56,70,72,100,200,240,250\n",
+)
+
+
+class Port_Group:
+    def __init__(self, vlan_access: int, description: str, table: Port_Table = None):
+        self.vlan_access = vlan_access
+        self.description = description
+        self.table = table
+        self.rows = array("I")
+        # (row position, blade, first port, last port) ranges of unconfigured ports
+        # that sit before rows[row position], never stored as rows
+        self.padding = []
+
+    def __len__(self) -> int:
+        padded = sum(last - first + 1 for _, _, first, last in self.padding)
+        return len(self.rows) + padded
+
+    # Views of the configured rows, padding ranges have no port to view
+    @property
+    def ports(self) -> list:
+        return [Port(self.table, row) for row in self.rows]
+
+    def append(self, port: Port):
+        if self.table is None:
+            self.table = port.table
+        self.rows.append(port.row)
+
+    # Returns a list of commands for configuring the port group
+    def get_configuration(self, interface_command: str = None) -> list:
+        if interface_command is None:
+            interface_command = self.get_interface_command()
+        # Tests if the group is vanilla
+        if self.vlan_access is None and self.description is None:
+            return [interface_command, *VANILLA_COMMANDS]
+        # Tests if the group is a vlan access group
+        if self.vlan_access is not None:
+            return [interface_command, f"vlan access {self.vlan_access}\n\n"]
+        # Tests if the group is a description group
+        if self.description is not None:
+            return [interface_command, f"description {self.description}\n\n"]
+
+    # Returns the whole block for the group's interface runs as one shared string
+    def render(self, runs: list) -> str:
+        key = (tuple(runs), self.vlan_access, self.description)
+        block = BLOCKS.get(key)
+        if block is None:
+            configuration = self.get_configuration(format_interface_command(runs))
+            block = BLOCKS.put(key, "".join(configuration))
+        return block
+
+    # Returns the interface command for a port group
+    def get_interface_command(self) -> str:
+        return get_interface_commands(self.table, [self])[0]
+
+    # Simplifies the rows to (blade, first port, last port) runs if possible
+    def get_interface_ranges(self) -> list:
+        return get_interface_runs(self.table, [self])[0]
+
+
+class Switch(Port_Group):
+    def __init__(self, blade_number: int, table: Port_Table = None):
+        self.blade_number = blade_number
+        super().__init__(None, None, table)
+
+    @property
+    def last_port_number(self) -> int:
+        if self.padding:
+            return self.padding[-1][3]
+        return self.table.port_numbers[self.rows[-1]]
+
+    # Adds unconfigured ports first..last after the ports parsed so far
+    def pad(self, first: int, last: int):
+        self.padding.append((len(self.rows), self.blade_number, first, last))
+
+    # Changes the location of every port to a specified blade
+    def remap(self, new_blade_number: int):
+        self.blade_number = new_blade_number
+        blade_numbers = self.table.blade_numbers
+        for row in self.rows:
+            blade_numbers[row] = new_blade_number
+        self.padding = [
+            (position, new_blade_number, first, last)
+            for position, _, first, last in self.padding
+        ]
+
+
+# Groups rows by vlan and description in insertion order with one dict lookup each
+class Port_Index:
+    def __init__(self, table: Port_Table):
+        self.table = table
+        self.all_ports = Port_Group(None, None, table)
+        self.vlan_groups = {}
+        self.description_groups = {}
+
+    # Adds the rows of a switch and its padding, which only the all ports group gets
+    def add_switch(self, switch: Switch):
+        offset = len(self.all_ports.rows)
+        self.add_rows(switch.rows)
+        for position, blade_number, first, last in switch.padding:
+            self.all_ports.padding.append(
+                (offset + position, blade_number, first, last)
+            )
+
+    def add_rows(self, rows: array):
+        vlans = self.table.vlans
+        descriptions = self.table.descriptions
+        description_names = self.table.description_names
+        self.all_ports.rows.extend(rows)
+        for row in rows:
+            vlan = vlans[row]
+            if vlan:
+                group = self.vlan_groups.get(vlan)
+                if group is None:
+                    group = Port_Group(vlan, None, self.table)
+                    self.vlan_groups[vlan] = group
+                group.rows.append(row)
+            description_id = descriptions[row]
+            if description_id:
+                description = description_names[description_id]
+                group = self.description_groups.get(description)
+                if group is None:
+                    group = Port_Group(None, description, self.table)
+                    self.description_groups[description] = group
+                group.rows.append(row)
+
+
+class Stack:
+    def __init__(
+        self,
+        hostname: str,
+        ip_address: str,
+        switches: list,
+        has_24_port: bool = None,
+        secondary_member: int = None,
+        table: Port_Table = None,
+    ):
+        self.hostname = hostname
+        self.node = hostname[-3:] if hostname[-3] != 0 else hostname[-2:]
+        self.ip_address = ip_address
+        self.switches = switches
+        if table is None:
+            table = switches[0].table if switches else Port_Table()
+        self.table = table
+        if has_24_port is None:
+            has_24_port = input("Configure 24 Port Switch? (Y/N): ").lower() == "y"
+        self.has_24_port = has_24_port
+        self.secondary_member = secondary_member
+        self.blade_map = {}
+        self.member_24 = None
+        self.index = None  # Port_Index of the current blade map, and its key
+        self.index_key = None
+        self.stats = Device_Stats(hostname)
+
+    # Yields every command in its final order without building the configuration.
+    # order renders the stack with new_order[i] as member i + 1 without remapping it
+    def iter_configuration(self, order: list = None):
+        yield f"hostname {self.hostname}\n\n"
+        yield f"interface vlan 1\nip address {self.ip_address}/16\nexit\n\n"
+        index = self.ip_address.index(".", self.ip_address.index(".") + 1)
+        yield f"ip route 0.0.0.0/0 {self.ip_address[:index]}.0.1\n\n"
+        yield from self.configure_lag_interface()
+        yield from self.iter_commands(order)
+
+    def get_configuration(self, order: list = None):
+        start = time.perf_counter()
+        seconds = self.stats.seconds
+        nested = seconds["group"] + seconds["ranges"]
+        commands = list(self.iter_configuration(order))
+        nested = seconds["group"] + seconds["ranges"] - nested
+        seconds["render"] += time.perf_counter() - start - nested
+        return commands
+
+    def get_commands(self, order: list = None):
+        return list(self.iter_commands(order))
+
+    def iter_commands(self, order: list = None):
+        blade_map = self.get_blade_map(order)
+        members = self.get_members(blade_map)
+        all_ports, vlan_groups, description_groups = self.sort(blade_map)
+        groups = [all_ports] + vlan_groups + description_groups
+        start = time.perf_counter()
+        rendered_map = {switch.blade_number: member for member, switch in members}
+        interface_runs = get_interface_runs(self.table, groups, rendered_map)
+        self.stats.seconds["ranges"] += time.perf_counter() - start
+        self.stats.groups = len(groups)
+        for group, runs in zip(groups, interface_runs):
+            yield group.render(runs)
+        yield from self.configure_uplink(members)
+        yield "vsf split-detect mgm\n\n"
+        secondary_member = self.secondary_member or members[-1][0]
+        yield f"vsf secondary-member {secondary_member}\n\n"
+
+    # Renders the stack with new_order[i] as member i + 1 from now on. Only the blade
+    # map changes, the table keeps the physical blade of every port
+    def remap(self, new_order: list):
+        self.blade_map = self.get_blade_map(new_order)
+
+    # Returns the blade to member map of an order, or of the current remap for None
+    def get_blade_map(self, order: list = None) -> dict:
+        if order is None:
+            return self.blade_map
+        blade_numbers = [
+            switch.blade_number
+            for switch in self.switches
+            if switch is not self.member_24
+        ]
+        if sorted(order) != sorted(blade_numbers):
+            raise ValueError(
+                f"Remap order {list(order)} does not match blades {blade_numbers}"
+            )
+        return {blade: member for member, blade in enumerate(order, start=1)}
+
+    # Returns (member number, switch) pairs in member order, 24 port member last
+    def get_members(self, blade_map: dict = None) -> list:
+        self.add_24_port_member()
+        if blade_map is None:
+            blade_map = self.blade_map
+        members = [
+            (blade_map.get(switch.blade_number, switch.blade_number), switch)
+            for switch in self.switches
+            if switch is not self.member_24
+        ]
+        if blade_map:
+            members.sort(key=itemgetter(0))
+        if self.member_24 is not None:
+            members.append((members[-1][0] + 1 if members else 1, self.member_24))
+        return members
+
+    # Appends the 24 port member once, numbered after the last parsed blade
+    def add_24_port_member(self):
+        if not self.has_24_port or self.member_24 is not None:
+            return
+        switch = Switch(self.switches[-1].blade_number + 1, self.table)
+        switch.pad(1, 24)
+        self.switches.append(switch)
+        self.member_24 = switch
+
+    # Returns the port groups of the stack in a member order
+    def sort(self, blade_map: dict = None) -> tuple:
+        index = self.get_index(blade_map)
+        return (
+            index.all_ports,
+            list(index.vlan_groups.values()),
+            list(index.description_groups.values()),
+        )
+
+    # Groups keep the member order. Only the current blade map's index is kept, so
+    # rendering many candidate orders holds one index at a time, not one per order
+    def get_index(self, blade_map: dict = None) -> Port_Index:
+        members = self.get_members(blade_map)
+        key = tuple(switch.blade_number for _, switch in members)
+        if key == self.index_key:
+            return self.index
+        start = time.perf_counter()
+        index = Port_Index(self.table)
+        for _, switch in members:
+            index.add_switch(switch)
+        if blade_map is None or blade_map == self.blade_map:
+            self.index = index
+            self.index_key = key
+        self.stats.ports = len(index.all_ports)
+        self.stats.seconds["group"] += time.perf_counter() - start
+        return index
+
+    def get_port_count(self) -> int:
+        return sum(len(switch) for _, switch in self.get_members())
+
+    # Returns the ports with access to a vlan without regrouping the stack
+    def ports_for_vlan(self, vlan) -> list:
+        group = self.get_index().vlan_groups.get(int(vlan))
+        return [] if group is None else group.ports
+
+    # Returns the ports with a description without regrouping the stack
+    def ports_with_description(self, description: str) -> list:
+        group = self.get_index().description_groups.get(description)
+        return [] if group is None else group.ports
+
+    # The uplink sits four ports past the last port of the last member
+    def get_uplink_location(self, members: list = None) -> str:
+        if members is None:
+            members = self.get_members()
+        member, switch = members[-1]
+        return f"{member}/1/{switch.last_port_number + 4}"
+
+    # Yields (member, port, vlan, description, padded) for every port as rendered,
+    # with None for an unset vlan or description
+    def iter_port_records(self, order: list = None):
+        table = self.table
+        description_names = table.description_names
+        for member, switch in self.get_members(self.get_blade_map(order)):
+            for row in switch.rows:
+                yield (
+                    member,
+                    table.port_numbers[row],
+                    table.vlans[row] or None,
+                    description_names[table.descriptions[row]],
+                    False,
+                )
+            for _, _, first, last in switch.padding:
+                for port_number in range(first, last + 1):
+                    yield (member, port_number, None, None, True)
+
+    # Returns the stack as (hostname, ip address, uplink, lag, port records)
+    def get_record(self) -> tuple:
+        return (
+            self.hostname,
+            self.ip_address,
+            self.get_uplink_location(),
+            f"lag {self.node}",
+            list(self.iter_port_records()),
+        )
+
+    def configure_uplink(self, members: list = None):
+        location = self.get_uplink_location(members)
+        key = ("uplink", location)
+        block = BLOCKS.get(key)
+        if block is None:
+            commands = [f"interface {location}\n", *UPLINK_COMMANDS]
+            commands.append("dhcpv4-snooping trust\n\n")
+            block = BLOCKS.put(key, "".join(commands))
+        return [block]
+
+    def configure_lag_interface(self):
+        key = ("lag", self.node)
+        block = BLOCKS.get(key)
+        if block is None:
+            commands = [f"interface lag {self.node}\n", *UPLINK_COMMANDS]
+            commands += ["dhcpv4-snooping trust\n", "lacp mode active\n\n"]
+            block = BLOCKS.put(key, "".join(commands))
+        return [block]
+
+
+class Device:
+    def __init__(
+        self, hostname: str, ip_address: str, table: Port_Table, lines: int = 0
+    ):
+        self.hostname = hostname
+        self.ip_address = ip_address
+        self.table = table
+        self.lines = lines
+
+
+# Matches of rules added outside the built-in kinds, for callers of Translator.parse
+class Line_Match:
+    def __init__(self, kind: str, fields: tuple, location: tuple):
+        self.kind = kind
+        self.fields = fields
+        self.location = location
+
+
+# Comware line rules keyed by the first token of a line, so every line costs one
+# dict lookup and an anchored match no matter how many stanzas are recognised
+LINE_RULES = {}
+BUILT_IN_KINDS = (
+    "interface",
+    "access vlan",
+    "description",
+    "end of block",
+    "sysname",
+    "ip address",
+    "return",
+)
+
+
+# Registers an anchored pattern for lines whose first token is token
+def add_line_rule(kind: str, token: str, pattern: str, rules: dict = LINE_RULES):
+    rules.setdefault(token, []).append((kind, re.compile(pattern)))
+
+
+add_line_rule(
+    "interface", "interface", r"interface GigabitEthernet(\d+)/[01]/(\d+)\s*$"
+)
+add_line_rule("access vlan", "port", r"\s*port access vlan (\d+)\s*$")
+add_line_rule("description", "description", r"\s*description (.*)")
+add_line_rule("end of block", "#", r"#\s*$")
+add_line_rule("sysname", "sysname", r"\s*sysname (.*)")
+add_line_rule("ip address", "ip", r"\s*ip address (\d+\.\d+\.\d+\.\d+) ")
+add_line_rule("return", "return", r"return\s*$")
+
+
+# Turns a sysname into the hostname the output file is named after, e.g. ROB SW 12
+# becomes ROB-SW-012
+def normalize_hostname(sysname: str) -> str:
+    hostname = sysname.upper().replace(" ", "_").replace("_", "-")
+    return f"{hostname[0:-2]}0{hostname[-2:]}" if hostname[-3] == "-" else hostname
+
+
+# The building is the hostname up to its first dash, e.g. ROB for ROB-SW-012
+def get_building(hostname: str) -> str:
+    return hostname.split("-", 1)[0]
+
+
+DEFAULT_FILTER = Description_Filter(DEFAULT_RULES)
+
+
+class Translator:
+    # Without a policy the translator prompts for every decision
+    def __init__(self, policy: Policy = None, rules: dict = LINE_RULES):
+        self.policy = policy
+        self.rules = rules
+        self.description_filter = DEFAULT_FILTER
+        if policy is not None and policy.description_filter is not None:
+            self.description_filter = policy.description_filter
+
+    # Translates the first device in a config file
+    def translate(self, old_config_name: str) -> Stack:
+        with open(old_config_name, "r") as old_config_file:
+            for stack in self.iter_stacks(old_config_file):
+                return stack
+        raise ValueError(f"No device configuration found in {old_config_name}")
+
+    # Yields a Stack per device, holding only one device in memory at a time
+    def iter_stacks(self, lines):
+        switches = []
+        start = time.perf_counter()
+        for record in self.parse(lines):
+            if type(record) is Switch:
+                switches.append(record)
+            elif type(record) is Device:
+                parse_seconds = time.perf_counter() - start  # Excludes any prompts
+                stack = self.build_stack(record, switches)
+                stack.stats.lines = record.lines
+                stack.stats.seconds["parse"] += parse_seconds
+                yield stack
+                switches = []
+                start = time.perf_counter()
+
+    # Streams a capture line by line, yielding each Port as its # block closes,
+    # each Switch once its blade is complete and a Device at the end of each device
+    def parse(self, lines):
+        rules = self.rules
+        filter_description = self.description_filter.apply
+        table = Port_Table()
+        hostname = None
+        ip_address = None
+        location = None
+        vlan_access = None
+        description = None
+        switch = None
+        line_number = 0
+        device_start = 0
+        for line_number, line in enumerate(lines, 1):
+            tokens = line.split(None, 1)
+            if not tokens or tokens[0] not in rules:
+                continue
+            for kind, pattern in rules[tokens[0]]:
+                match = pattern.match(line)
+                if match is not None:
+                    break
+            else:
+                continue
+            if kind == "interface":
+                location = (int(match[1]), int(match[2]))
+            elif kind == "access vlan" and location is not None:
+                vlan_access = int(match[1])
+            elif kind == "description" and location is not None:
+                description = filter_description(match[1])
+            elif kind == "end of block" and location is not None:
+                blade_number, port_number = location
+                row = table.append(blade_number, port_number, vlan_access, description)
+                if switch is None or blade_number != switch.blade_number:
+                    if switch is not None:
+                        yield switch
+                    switch = Switch(blade_number, table)
+                switch.rows.append(row)
+                yield Port(table, row)
+                location = None
+                vlan_access = None
+                description = None
+            elif kind == "sysname":
+                # A second sysname means a concatenated capture without "return"
+                if hostname is not None:
+                    if switch is not None:
+                        yield switch
+                    lines_parsed = line_number - 1 - device_start
+                    yield Device(hostname, ip_address, table, lines_parsed)
+                    device_start = line_number - 1
+                    table = Port_Table()
+                    ip_address = None
+                    switch = None
+                hostname = normalize_hostname(match[1])
+            elif kind == "ip address":
+                ip_address = match[1]
+            elif kind == "return" and hostname is not None:
+                if switch is not None:
+                    yield switch
+                yield Device(hostname, ip_address, table, line_number - device_start)
+                device_start = line_number
+                table = Port_Table()
+                hostname = None
+                ip_address = None
+                location = None
+                switch = None
+            elif kind not in BUILT_IN_KINDS:
+                yield Line_Match(kind, match.groups(), location)
+        if hostname is not None:
+            if switch is not None:
+                yield switch
+            yield Device(hostname, ip_address, table, line_number - device_start)
+
+    # Applies padding and the device policy to a parsed device
+    def build_stack(self, device: Device, switches: list) -> Stack:
+        hostname = device.hostname
+        ip_address = device.ip_address
+        table = device.table
+        answers = None
+        if self.policy is not None:
+            answers = self.policy.for_hostname(hostname)
+        for switch in switches:
+            port_num = switch.last_port_number
+            if port_num == 48:
+                continue
+            if answers is not None:
+                upgrade = answers.upgrades(switch.blade_number)
+            else:
+                print(f"*Blade {switch.blade_number} has {port_num} ports*")
+                upgrade = input("Upgrade to 48 Port Switch? (Y/N): ").lower() == "y"
+            if upgrade:
+                switch.pad(port_num + 1, 48)
+        if answers is None:
+            return Stack(hostname, ip_address, switches, table=table)
+        stack = Stack(
+            hostname,
+            ip_address,
+            switches,
+            answers.has_24_port,
+            answers.secondary_member,
+            table,
+        )
+        if answers.remap is not None:
+            stack.remap(answers.remap)
+        return stack
+
+
+# Streams a configuration to a file name, "-" for stdout, a socket or any writable
+# text file through one buffer while it is still being rendered. Rendering and
+# writing overlap, so both are recorded as write time. Returns the characters
+# written and feeds them to digest when one is given
+def write_configuration(
+    stack: Stack, target, digest=None, buffer_size: int = 65536
+) -> int:
+    start = time.perf_counter()
+    seconds = stack.stats.seconds
+    nested = seconds["group"] + seconds["ranges"]
+    # Only a loaded socket module can have made a socket, so it is never imported
+    socket_module = sys.modules.get("socket")
+    if socket_module is not None and isinstance(target, socket_module.socket):
+        output = target.makefile("w", buffering=buffer_size, encoding="utf-8")
+    elif target == "-":
+        output = sys.stdout
+    elif isinstance(target, str):
+        output = open(target, "w", buffering=buffer_size)
+    else:
+        output = target
+    size = 0
+    try:
+        for command in stack.iter_configuration():
+            output.write(command)
+            size += len(command)
+            if digest is not None:
+                digest.update(command.encode())
+        output.flush()
+    finally:
+        if output is not target and output is not sys.stdout:
+            output.close()  # Closing a socket's makefile leaves the socket open
+    stack.stats.bytes = size
+    nested = seconds["group"] + seconds["ranges"] - nested
+    seconds["write"] += time.perf_counter() - start - nested
+    return size
+
+
+# Writes one configuration per device in the file and returns their hostnames
+def generate_config(file_name: str, policy: Policy = None) -> list:
+    t = Translator(policy)
+    hostnames = []
+    with open(file_name, "r") as old_config_file:
+        for stack in t.iter_stacks(old_config_file):
+            write_configuration(stack, f"{stack.hostname}.txt")
+            STATS.add(stack.stats.as_dict())
+            hostnames.append(stack.hostname)
+    return hostnames
+
+
+# Expands a directory or glob pattern into a sorted list of config files
+def find_configs(source: str) -> list:
+    if os.path.isdir(source):
+        file_names = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        import glob
+
+        file_names = glob.glob(source)
+    return sorted(name for name in file_names if os.path.isfile(name))
@@ -0,0 +1,80 @@
+import os
+import random
+
+# Deterministic generator of Comware "display current-configuration" captures.
+# The same arguments always produce byte-identical files, so benchmark runs on
+# different commits translate exactly the same fleet
+DESCRIPTIONS = ["Office", "Printer", "Camera", "Lab", "Desk", "Kiosk", "Phone", "Room"]
+FILTERED_DESCRIPTIONS = ["AP-Hallway", "Ruckus AP"]  # Dropped by the translators
+
+
+def get_hostname(index: int) -> str:
+    return f"BLDG{index // 100:03d} SW {index % 100 + 1}"
+
+
+def get_ip_address(index: int) -> str:
+    index += 2
+    return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+
+# Returns one device capture as text
+def generate_device(
+    index: int,
+    blades: int = 2,
+    ports_per_blade: int = 48,
+    vlan_count: int = 4,
+    description_count: int = 8,
+    seed: int = 0,
+) -> str:
+    generator = random.Random(f"{seed}:{index}")
+    vlans = [40 + 20 * i for i in range(vlan_count)]
+    descriptions = [
+        f"{DESCRIPTIONS[i % len(DESCRIPTIONS)]} {i}" for i in range(description_count)
+    ]
+    lines = [
+        "#",
+        " version 7.1.070, Release 3208P10",
+        "#",
+        f" sysname {get_hostname(index)}",
+        "#",
+        " clock timezone EST minus 05:00:00",
+        "#",
+    ]
+    for vlan in vlans:
+        lines += [f"vlan {vlan}", f" description VLAN {vlan}", "#"]
+    lines += [
+        "interface NULL0",
+        "#",
+        "interface Vlan-interface1",
+        f" ip address {get_ip_address(index)} 255.255.0.0",
+        "#",
+    ]
+    for blade in range(1, blades + 1):
+        for port in range(1, ports_per_blade + 1):
+            lines.append(f"interface GigabitEthernet{blade}/0/{port}")
+            lines.append(" port link-mode bridge")
+            if vlans and generator.random() < 0.4:
+                lines.append(f" port access vlan {generator.choice(vlans)}")
+            roll = generator.random()
+            if descriptions and roll < 0.3:
+                lines.append(f" description {generator.choice(descriptions)}")
+            elif roll < 0.33:
+                lines.append(f" description {generator.choice(FILTERED_DESCRIPTIONS)}")
+            lines.append(" stp edge-port")
+            lines.append("#")
+        lines += [f"interface Ten-GigabitEthernet{blade}/0/49", "#"]
+    lines.append("return")
+    return "\n".join(lines) + "\n"
+
+
+# Writes devices 0 to count - 1 into a directory and returns their file names
+def generate_fleet(directory: str, count: int, **options) -> list:
+    os.makedirs(directory, exist_ok=True)
+    file_names = []
+    for index in range(count):
+        file_name = os.path.join(directory, f"device_{index:05d}.txt")
+        if not os.path.exists(file_name):
+            with open(file_name, "w") as device_file:
+                device_file.write(generate_device(index, **options))
+        file_names.append(file_name)
+    return file_names
@@ -0,0 +1,124 @@
+import argparse
+import difflib
+import os
+import sys
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.dirname(BENCHMARK_DIRECTORY)
+GOLDEN_DIRECTORY = os.path.join(BENCHMARK_DIRECTORY, "golden")
+sys.path.insert(0, REPOSITORY_DIRECTORY)
+
+from fleet import generate_device  # noqa: E402
+
+# Translates generated devices under a set of policies and compares every rendered
+# configuration with the one committed in benchmarks/golden, so an optimization of
+# the port table, range compression, padding or the block cache that changes a
+# single byte of output fails here. Each stack is also rendered again after going
+# through pack_stack and unpack_stack, the way the parse cache and the staged
+# pipeline hand stacks around. Run with --update after an intended output change
+# and review the diff of the golden files.
+#
+#   python benchmarks/golden.py
+#   python benchmarks/golden.py --update
+DEVICES = 3  # Per case, so later devices render from a warm block cache
+CASES = {
+    # name: (generate_device options, Policy arguments)
+    "stack": ({}, {}),
+    "short": ({"blades": 3, "ports_per_blade": 24}, {}),
+    "padded": (
+        {"blades": 3, "ports_per_blade": 24},
+        {"default": {"upgrade_to_48": True}},
+    ),
+    "padded_some": (
+        {"blades": 3, "ports_per_blade": 20},
+        {"default": {"upgrade_to_48": [1, 3]}},
+    ),
+    "member_24": ({}, {"default": {"has_24_port": True}}),
+    "remap": (
+        {"blades": 3},
+        {"default": {"remap": [3, 1, 2], "has_24_port": True, "secondary_member": 2}},
+    ),
+    "descriptions": (
+        {"vlan_count": 2, "description_count": 8},
+        {
+            "descriptions": [
+                {"substring": "ap"},
+                {"word": "ruckus", "replace": "WAP"},
+                {"regex": "^(desk|lab) (\\d+)$", "replace": "Workstation"},
+            ]
+        },
+    ),
+}
+
+
+# Returns the configurations of a case, rendered directly and from packed stacks
+def render_case(options: dict, policy: dict) -> tuple:
+    from autoconfig.packing import pack_stack, unpack_stack
+    from autoconfig.policy import Policy
+    from autoconfig.translator import Translator
+
+    translator = Translator(Policy(**policy))
+    rendered = []
+    unpacked = []
+    for index in range(DEVICES):
+        text = generate_device(index, **options)
+        for stack in translator.iter_stacks(text.splitlines(True)):
+            data = pack_stack(stack)
+            rendered.append("".join(stack.get_configuration()))
+            unpacked.append("".join(unpack_stack(data)[0].get_configuration()))
+    return "".join(rendered), "".join(unpacked)
+
+
+# Returns the first lines where two outputs differ, as a unified diff
+def get_difference(expected: str, actual: str, name: str, lines: int = 12) -> str:
+    difference = difflib.unified_diff(
+        expected.splitlines(True),
+        actual.splitlines(True),
+        f"golden/{name}.txt",
+        name,
+        n=1,
+    )
+    return "".join(line for _, line in zip(range(lines), difference))
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the translated output")
+    parser.add_argument(
+        "--update", action="store_true", help="Rewrite the golden files"
+    )
+    parser.add_argument("--cases", default=",".join(CASES), help="Cases to run")
+    arguments = parser.parse_args(argv)
+    from autoconfig.translator import BLOCKS
+
+    BLOCKS.clear()
+    failed = 0
+    for name in arguments.cases.split(","):
+        options, policy = CASES[name]
+        rendered, unpacked = render_case(options, policy)
+        golden_name = os.path.join(GOLDEN_DIRECTORY, f"{name}.txt")
+        if arguments.update:
+            os.makedirs(GOLDEN_DIRECTORY, exist_ok=True)
+            with open(golden_name, "w", newline="") as golden_file:
+                golden_file.write(rendered)
+        try:
+            with open(golden_name, "r", newline="") as golden_file:
+                expected = golden_file.read()
+        except FileNotFoundError:
+            expected = ""
+        problems = []
+        if rendered != expected:
+            problems.append(get_difference(expected, rendered, name))
+        if unpacked != rendered:
+            problems.append(get_difference(rendered, unpacked, f"{name} unpacked"))
+        status = "differs" if problems else "ok"
+        print(f"{name:>14} {len(rendered):>8} chars  {status}")
+        for problem in problems:
+            print(problem, end="")
+        failed += bool(problems)
+    if arguments.update:
+        print(f"*Golden Files Written to {GOLDEN_DIRECTORY}*")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.dirname(BENCHMARK_DIRECTORY)
+
+# Imports every entry module in a fresh interpreter under "python -X importtime"
+# and fails when one goes over its startup budget, pulls in a module it should
+# only load on demand, prompts, or touches the working directory.
+#
+#   python benchmarks/importtime.py
+#   python benchmarks/importtime.py --repeat 10 --scale 2 --output importtime.json
+BUDGETS_MS = {
+    "autoconfig": 5,
+    "autoconfig.cli": 25,
+    "autoconfig.translator": 60,
+    "AutoConfigV1": 20,  # Builds its description filter, and so compiles a regex
+    "AutoConfigV2": 40,
+    "AutoConfigV3": 25,
+}
+LAZY_MODULES = {
+    "autoconfig": ["autoconfig.translator", "autoconfig.policy", "json"],
+    "autoconfig.cli": [
+        "autoconfig.translator",
+        "autoconfig.batch",
+        "autoconfig.server",
+        "autoconfig.delta",
+        "autoconfig.preflight",
+        "autoconfig.collector",
+        "autoconfig.push",
+        "autoconfig.profiling",
+        "autoconfig.pipeline",
+        "asyncio",
+        "sqlite3",
+    ],
+    "autoconfig.translator": [
+        "autoconfig.batch",
+        "autoconfig.packing",
+        "autoconfig.cache",
+        "concurrent.futures",
+        "autoconfig.profiling",
+        "asyncio",
+        "glob",
+        "sqlite3",
+        "socket",
+        "struct",
+        "zlib",
+        "hashlib",
+    ],
+    "AutoConfigV3": ["autoconfig.translator"],
+}
+
+
+# Returns the cumulative microseconds of every module imported by one statement
+def measure(module: str, working_directory: str) -> dict:
+    environment = dict(os.environ, PYTHONPATH=REPOSITORY_DIRECTORY)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=working_directory,
+        env=environment,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1]
+        raise RuntimeError(f"import {module} failed: {error}")
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+def check(module: str, repeat: int, scale: float) -> dict:
+    times = []
+    loaded = set()
+    with tempfile.TemporaryDirectory() as working_directory:
+        for _ in range(repeat):
+            cumulative = measure(module, working_directory)
+            times.append(cumulative[module] / 1000)
+            loaded.update(cumulative)
+        created = os.listdir(working_directory)
+    budget = BUDGETS_MS[module] * scale
+    problems = []
+    best = min(times)
+    if best > budget:
+        problems.append(f"{best:.1f}ms is over the {budget:.1f}ms budget")
+    for lazy_module in LAZY_MODULES.get(module, []):
+        if lazy_module in loaded:
+            problems.append(f"loads {lazy_module} at import")
+    if created:
+        problems.append(f"created {', '.join(sorted(created))} at import")
+    return {
+        "module": module,
+        "best_ms": best,
+        "budget_ms": budget,
+        "problems": problems,
+    }
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the import time budgets")
+    parser.add_argument("--repeat", type=int, default=5, help="Best of this many")
+    parser.add_argument("--scale", type=float, default=1.0, help="Budget multiplier")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    arguments = parser.parse_args(argv)
+    results = []
+    for module in BUDGETS_MS:
+        try:
+            result = check(module, arguments.repeat, arguments.scale)
+        except (RuntimeError, subprocess.TimeoutExpired) as error:
+            result = {"module": module, "best_ms": None, "problems": [str(error)]}
+        results.append(result)
+        best = "-" if result["best_ms"] is None else f"{result['best_ms']:.1f}ms"
+        status = "; ".join(result["problems"]) or "ok"
+        print(f"{module:>22} {best:>9}  {status}")
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    return 1 if any(result["problems"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
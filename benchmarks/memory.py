@@ -0,0 +1,128 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.dirname(BENCHMARK_DIRECTORY)
+sys.path.insert(0, REPOSITORY_DIRECTORY)
+
+from fleet import generate_fleet  # noqa: E402
+
+# Runs Translator.translate, Stack.sort and Stack.get_configuration over growing
+# generated fleets while holding every stack and configuration, the way a batch
+# that keeps its results does, and fails when the memory a phase keeps or peaks
+# at goes over its budget per port or per device. Budgets are bytes measured by
+# tracemalloc, recorded at about 1.5 times the current tree, so a regression like
+# a Python object per port or a command list per group fails them. Small fleets
+# cost more per port since the shared block cache is not yet spread over many.
+#
+#   python benchmarks/memory.py
+#   python benchmarks/memory.py --scales 10x2,100x2,1000x4 --output memory.json
+PHASES = ("parse", "sort", "render")
+BUDGETS = {
+    # phase: (retained bytes per port, peak bytes per port, retained bytes per
+    # device of two blades, scaled with the blade count)
+    "parse": (75, 110, 7200),
+    "sort": (88, 90, 8400),
+    "render": (140, 160, 13700),
+}
+SCALES = ((10, 2), (100, 2), (1000, 2), (100, 8))  # (devices, blades)
+
+
+# Returns the bytes each phase keeps and peaks at over a fleet held in memory
+def measure(file_names: list) -> dict:
+    from autoconfig.policy import Policy
+    from autoconfig.translator import BLOCKS, Translator
+
+    translator = Translator(Policy())
+    BLOCKS.clear()
+    gc.collect()
+    tracemalloc.start()
+    results = {}
+    held = []
+
+    def phase(name: str, run):
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        held.append(run())
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        results[name] = {"retained": current - before, "peak": peak - before}
+
+    try:
+        phase("parse", lambda: [translator.translate(name) for name in file_names])
+        stacks = held[0]
+        phase("sort", lambda: [stack.sort() for stack in stacks])
+        phase("render", lambda: [stack.get_configuration() for stack in stacks])
+    finally:
+        tracemalloc.stop()
+    ports = sum(stack.get_port_count() for stack in stacks)
+    return {"devices": len(stacks), "ports": ports, "phases": results}
+
+
+def check(result: dict, scale: float) -> list:
+    problems = []
+    devices = result["devices"]
+    ports = result["ports"]
+    for name in PHASES:
+        phase = result["phases"][name]
+        retained_per_port, peak_per_port, retained_per_device = BUDGETS[name]
+        retained_per_device *= result["blades"] / 2
+        measured = (
+            ("retained bytes/port", phase["retained"] / ports, retained_per_port),
+            ("peak bytes/port", phase["peak"] / ports, peak_per_port),
+            ("retained bytes/device", phase["retained"] / devices, retained_per_device),
+        )
+        phase["per_port"] = phase["retained"] / ports
+        phase["per_device"] = phase["retained"] / devices
+        for label, value, budget in measured:
+            budget *= scale
+            if value > budget:
+                problems.append(f"{name} {label} {value:.0f} is over {budget:.0f}")
+    return problems
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the memory budgets")
+    parser.add_argument(
+        "--scales",
+        default=",".join(f"{devices}x{blades}" for devices, blades in SCALES),
+        help="devices x blades per fleet",
+    )
+    parser.add_argument("--scale", type=float, default=1.0, help="Budget multiplier")
+    parser.add_argument(
+        "--work-directory", default=os.path.join(tempfile.gettempdir(), "autoconfig")
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    arguments = parser.parse_args(argv)
+    results = []
+    for scale in arguments.scales.split(","):
+        devices, blades = (int(value) for value in scale.split("x"))
+        fleet_directory = os.path.join(
+            arguments.work_directory, f"memory_fleet_{blades}"
+        )
+        file_names = generate_fleet(fleet_directory, devices, blades=blades)
+        result = measure(file_names)
+        result["blades"] = blades
+        result["problems"] = check(result, arguments.scale)
+        results.append(result)
+        phases = "  ".join(
+            f"{name} {result['phases'][name]['per_port']:6.1f}B/port "
+            f"{result['phases'][name]['peak'] / result['ports']:6.1f}B/port peak"
+            for name in PHASES
+        )
+        status = "; ".join(result["problems"]) or "ok"
+        print(f"{devices:>6} devices x{blades:<2} {phases}  {status}")
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    return 1 if any(result["problems"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,482 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.dirname(BENCHMARK_DIRECTORY)
+sys.path.insert(0, REPOSITORY_DIRECTORY)
+
+from fleet import generate_fleet  # noqa: E402
+
+# Times every pipeline phase by phase in process. The V1 and V2 scripts get their
+# prompts answered in place, and the start of a fresh interpreter importing each
+# of them is reported on its own as startup_seconds.
+#
+#   python benchmarks/run.py --devices 1,10,100,1000 --output bench.json
+#   python benchmarks/run.py --compare old.json --output new.json
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPOSITORY_DIRECTORY,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Parse, group, render and write every file with the V3 classes
+def bench_v3(file_names: list, output_directory: str) -> dict:
+    from autoconfig.translator import BLOCKS, Translator
+    from autoconfig.policy import Policy
+
+    translator = Translator(Policy())
+    BLOCKS.clear()  # Every run starts cold, as a fresh process would
+    timings = {"parse": 0.0, "group": 0.0, "render": 0.0, "write": 0.0}
+    devices = 0
+    ports = 0
+    for file_name in file_names:
+        start = time.perf_counter()
+        with open(file_name, "r") as old_config_file:
+            stacks = list(translator.iter_stacks(old_config_file))
+        grouped = time.perf_counter()
+        for stack in stacks:
+            stack.sort()
+        rendered = time.perf_counter()
+        configs = [stack.get_configuration() for stack in stacks]
+        written = time.perf_counter()
+        for stack, config in zip(stacks, configs):
+            config_name = os.path.join(output_directory, f"{stack.hostname}.txt")
+            with open(config_name, "w") as config_file:
+                config_file.writelines(config)
+            devices += 1
+            ports += stack.stats.ports
+        end = time.perf_counter()
+        timings["parse"] += grouped - start
+        timings["group"] += rendered - grouped
+        timings["render"] += written - rendered
+        timings["write"] += end - written
+    timings["total"] = sum(timings.values())
+    blocks = {"hits": BLOCKS.hits, "misses": BLOCKS.misses}
+    return {"devices": devices, "ports": ports, "seconds": timings, "blocks": blocks}
+
+
+# The V3 batch command across a process pool
+def bench_v3_batch(source: str, output_directory: str) -> dict:
+    from autoconfig.batch import batch_translate
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = batch_translate(source, output_directory)
+    elapsed = time.perf_counter() - start
+    devices = sum(len(hostnames) for _, hostnames, error in results if not error)
+    return {"devices": devices, "seconds": {"total": elapsed}}
+
+
+# The V3 batch command through the staged pipeline, with how full each stage's
+# queue ran
+def bench_v3_pipeline(source: str, output_directory: str) -> dict:
+    from concurrent.futures import ProcessPoolExecutor
+
+    from autoconfig.pipeline import Pipeline, get_stages
+    from autoconfig.policy import Policy
+    from autoconfig.translator import find_configs
+
+    workers = os.cpu_count() or 1
+    os.makedirs(output_directory)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pipeline = Pipeline(get_stages(executor, output_directory, Policy(), workers))
+        jobs = list(pipeline.run(find_configs(source)))
+    elapsed = time.perf_counter() - start
+    devices = sum(len(job.data) for job in jobs if job.error is None)
+    return {
+        "devices": devices,
+        "seconds": {"total": elapsed},
+        "stages": pipeline.summary(),
+    }
+
+
+# Sends every file to a local translation server from concurrent clients and
+# records the latency of each request as seen by the client
+def bench_v3_server(file_names: list, clients: int = 16) -> dict:
+    from autoconfig.policy import Policy
+    from autoconfig.server import Translation_Server, post
+
+    async def run_clients(address: str) -> tuple:
+        server = Translation_Server(Policy())
+        await server.start(address)
+        sources = []
+        for file_name in file_names:
+            with open(file_name, "rb") as source_file:
+                sources.append(source_file.read())
+        latencies = []
+        devices = 0
+        next_source = iter(sources)
+
+        async def client():
+            nonlocal devices
+            for source in next_source:
+                start = time.perf_counter()
+                status, response = await post(address, "/translate", source)
+                latencies.append(time.perf_counter() - start)
+                if status == 200:
+                    devices += len(response["devices"])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        await server.close()
+        return (devices, elapsed, sorted(latencies))
+
+    with tempfile.TemporaryDirectory() as socket_directory:
+        address = os.path.join(socket_directory, "server.sock")
+        devices, elapsed, latencies = asyncio.run(run_clients(address))
+    return {
+        "devices": devices,
+        "seconds": {"total": elapsed},
+        "latency_ms": {
+            "p50": latencies[len(latencies) // 2] * 1000,
+            "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        },
+    }
+
+
+# Collects every file from fake devices with a bounded number of connections,
+# translating each configuration as it arrives
+def bench_v3_collect(
+    file_names: list, output_directory: str, connections: int = 32
+) -> dict:
+    from autoconfig.collector import Collector, Target
+    from autoconfig.fake_devices import Fake_Comware_Server
+    from autoconfig.policy import Policy
+
+    async def run_collector() -> tuple:
+        configs = []
+        for file_name in file_names:
+            with open(file_name, "r") as config_file:
+                configs.append((os.path.basename(file_name), config_file.read()))
+        fake = Fake_Comware_Server(configs)
+        targets = [Target(*target) for target in await fake.start()]
+        collector = Collector(policy=Policy(), connections=connections)
+        latencies = []
+        devices = 0
+        start = time.perf_counter()
+        async for result in collector.collect(targets, output_directory):
+            latencies.append(result.seconds)
+            devices += len(result.hostnames)
+        elapsed = time.perf_counter() - start
+        await fake.close()
+        return (devices, elapsed, sorted(latencies), collector.peak_connections)
+
+    devices, elapsed, latencies, peak_connections = asyncio.run(run_collector())
+    return {
+        "devices": devices,
+        "seconds": {"total": elapsed},
+        "latency_ms": {
+            "p50": latencies[len(latencies) // 2] * 1000,
+            "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        },
+        "peak_connections": peak_connections,
+    }
+
+
+# Pushes the translation of every file to fake switches 1ms away, so the pipelined
+# command stream and the connection limit are what is measured
+def bench_v3_push(
+    file_names: list, connections: int = 32, latency: float = 0.001
+) -> dict:
+    from autoconfig.collector import Target
+    from autoconfig.fake_devices import Fake_AOSCX_Server
+    from autoconfig.policy import Policy
+    from autoconfig.push import Push_Engine, get_push_commands
+    from autoconfig.translator import Translator
+
+    translator = Translator(Policy())
+    commands = {}
+    for file_name in file_names:
+        with open(file_name, "r") as old_config_file:
+            for stack in translator.iter_stacks(old_config_file):
+                configuration = stack.get_configuration()
+                commands[stack.hostname] = get_push_commands(configuration, True)
+
+    async def run_push() -> tuple:
+        fake = Fake_AOSCX_Server(list(commands), latency=latency)
+        targets = await fake.start()
+        engine = Push_Engine(connections=connections)
+        jobs = [(Target(*target), commands[target[0]]) for target in targets]
+        latencies = []
+        sent = 0
+        window_waits = 0.0
+        start = time.perf_counter()
+        async for result in engine.push(jobs):
+            latencies.append(result.seconds)
+            sent += len(result.outputs)
+            window_waits += result.window_waits
+        elapsed = time.perf_counter() - start
+        await fake.close()
+        waits = {"connection": engine.connection_waits, "window": window_waits}
+        return (elapsed, sorted(latencies), sent, waits)
+
+    elapsed, latencies, sent, waits = asyncio.run(run_push())
+    return {
+        "devices": len(latencies),
+        "seconds": {"total": elapsed},
+        "latency_ms": {
+            "p50": latencies[len(latencies) // 2] * 1000,
+            "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        },
+        "commands_per_second": sent / elapsed if elapsed else None,
+        "wait_seconds": waits,
+    }
+
+
+# Replaces name on owner with a wrapper that adds its run time to timings[phase]
+# and returns the original, for restore_method
+def time_method(owner, name: str, timings: dict, phase: str):
+    original = getattr(owner, name)
+
+    def timed(*arguments, **keywords):
+        start = time.perf_counter()
+        try:
+            return original(*arguments, **keywords)
+        finally:
+            timings[phase] += time.perf_counter() - start
+
+    setattr(owner, name, timed)
+    return original
+
+
+# Seconds for a fresh interpreter to start and import a legacy script, reported
+# apart from the phases since the old subprocess-per-device runs were mostly this
+def get_startup(version: str) -> float:
+    environment = dict(os.environ, PYTHONPATH=REPOSITORY_DIRECTORY)
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", f"import AutoConfig{version}"],
+        cwd=REPOSITORY_DIRECTORY,
+        env=environment,
+        capture_output=True,
+    )
+    return time.perf_counter() - start
+
+
+# Traces, groups, renders and writes every file with the V1 functions in process,
+# answering its prompts from the same values the script would read on stdin
+def bench_v1(file_names: list, output_directory: str, blades: int) -> dict:
+    import AutoConfigV1 as legacy
+
+    timings = {"parse": 0.0, "group": 0.0, "render": 0.0, "write": 0.0}
+    get_grouped_port_table = time_method(
+        legacy, "get_grouped_port_table", timings, "group"
+    )
+    devices = 0
+    try:
+        for file_name in file_names:
+            answers = iter([f"{blades}", "n", "n"])
+            legacy.input = lambda prompt: next(answers)
+            legacy.new_config_file = io.StringIO()
+            start = time.perf_counter()
+            with open(file_name, "r") as old_config_file:
+                legacy.old_config_file = old_config_file
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stack = legacy.get_stack()
+            parsed = time.perf_counter()
+            grouped = timings["group"]
+            legacy.configure_vanilla(stack)
+            legacy.configure_access(stack)
+            legacy.configure_description(stack)
+            legacy.new_config_file.write("write mem")
+            rendered = time.perf_counter()
+            config_name = os.path.join(output_directory, f"{devices}.txt")
+            with open(config_name, "w") as config_file:
+                config_file.write(legacy.new_config_file.getvalue())
+            end = time.perf_counter()
+            timings["parse"] += parsed - start
+            timings["render"] += rendered - parsed - (timings["group"] - grouped)
+            timings["write"] += end - rendered
+            devices += 1
+    finally:
+        legacy.get_grouped_port_table = get_grouped_port_table
+        del legacy.input
+        legacy.old_config_file = legacy.new_config_file = None
+    timings["total"] = sum(timings.values())
+    return {"devices": devices, "seconds": timings}
+
+
+# Traces every file with the V2 classes in process under a policy, so no prompt
+# is asked. Grouping and rendering happen inside Config_Tracer.trace, so they
+# are timed around Stack.trace_stack and Stack.write_configuration and the rest
+# of the trace counts as parsing
+def bench_v2(file_names: list, output_directory: str, blades: int) -> dict:
+    import AutoConfigV2 as legacy
+    from autoconfig.policy import Policy
+
+    policy = Policy({"switch_count": blades})
+    timings = {"parse": 0.0, "group": 0.0, "render": 0.0, "write": 0.0}
+    trace_stack = time_method(legacy.Stack, "trace_stack", timings, "group")
+    write_configuration = time_method(
+        legacy.Stack, "write_configuration", timings, "render"
+    )
+    devices = 0
+    try:
+        for file_name in file_names:
+            legacy.new_config_file = io.StringIO()
+            grouped = timings["group"]
+            rendered = timings["render"]
+            start = time.perf_counter()
+            with open(file_name, "r") as old_config_file:
+                tracer = legacy.Config_Tracer(
+                    old_config_file, legacy.new_config_file, policy
+                )
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stack = tracer.trace()
+            traced = time.perf_counter()
+            config_name = os.path.join(output_directory, f"{stack.hostname}.txt")
+            with open(config_name, "w") as config_file:
+                config_file.write(legacy.new_config_file.getvalue())
+            end = time.perf_counter()
+            inner = timings["group"] - grouped + timings["render"] - rendered
+            timings["parse"] += traced - start - inner
+            timings["write"] += end - traced
+            devices += 1
+    finally:
+        legacy.Stack.trace_stack = trace_stack
+        legacy.Stack.write_configuration = write_configuration
+        legacy.new_config_file = None
+    timings["total"] = sum(timings.values())
+    return {"devices": devices, "seconds": timings}
+
+
+def run(arguments) -> dict:
+    options = {
+        "blades": arguments.blades,
+        "ports_per_blade": arguments.ports_per_blade,
+        "vlan_count": arguments.vlans,
+        "description_count": arguments.descriptions,
+        "seed": arguments.seed,
+    }
+    fleet_name = "fleet_" + "_".join(f"{value}" for value in options.values())
+    fleet_directory = os.path.join(arguments.work_directory, fleet_name)
+    all_file_names = generate_fleet(fleet_directory, max(arguments.devices), **options)
+    runs = []
+    for count in arguments.devices:
+        file_names = all_file_names[:count]
+        for pipeline in arguments.pipelines:
+            if pipeline in ("v1", "v2") and count > arguments.legacy_max:
+                continue
+            with tempfile.TemporaryDirectory() as output_directory:
+                if pipeline == "v3":
+                    result = bench_v3(file_names, output_directory)
+                elif pipeline in ("v3-batch", "v3-pipeline"):
+                    source = os.path.join(output_directory, "source")
+                    os.makedirs(source)
+                    for file_name in file_names:
+                        link_name = os.path.join(source, os.path.basename(file_name))
+                        try:
+                            os.link(file_name, link_name)
+                        except OSError:
+                            shutil.copy(file_name, link_name)
+                    output = os.path.join(output_directory, "out")
+                    if pipeline == "v3-batch":
+                        result = bench_v3_batch(source, output)
+                    else:
+                        result = bench_v3_pipeline(source, output)
+                elif pipeline == "v3-server":
+                    result = bench_v3_server(file_names)
+                elif pipeline == "v3-collect":
+                    result = bench_v3_collect(file_names, output_directory)
+                elif pipeline == "v3-push":
+                    result = bench_v3_push(file_names)
+                elif pipeline == "v1":
+                    result = bench_v1(file_names, output_directory, arguments.blades)
+                    result["startup_seconds"] = get_startup("V1")
+                else:
+                    result = bench_v2(file_names, output_directory, arguments.blades)
+                    result["startup_seconds"] = get_startup("V2")
+            total = result["seconds"]["total"]
+            result["pipeline"] = pipeline
+            result["files"] = count
+            result["devices_per_second"] = result["devices"] / total if total else None
+            runs.append(result)
+            print(
+                f"{pipeline:>8} {count:>6} files  {total:9.3f}s  "
+                f"{result['devices_per_second'] or 0:10.1f} devices/s",
+                file=sys.stderr,
+            )
+    return {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fleet": options,
+        "runs": runs,
+    }
+
+
+# Prints the ratio of every phase to the same run in an earlier result file
+def compare(previous: dict, current: dict):
+    earlier = {(run["pipeline"], run["files"]): run for run in previous["runs"]}
+    print(
+        f"{'pipeline':>8} {'files':>6} {'phase':>7} {'before':>10} {'after':>10} ratio"
+    )
+    for run in current["runs"]:
+        before = earlier.get((run["pipeline"], run["files"]))
+        if before is None:
+            continue
+        for phase, seconds in run["seconds"].items():
+            if phase in before["seconds"] and before["seconds"][phase] > 0:
+                ratio = seconds / before["seconds"][phase]
+                print(
+                    f"{run['pipeline']:>8} {run['files']:>6} {phase:>7} "
+                    f"{before['seconds'][phase]:10.4f} {seconds:10.4f} {ratio:5.2f}"
+                )
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Benchmark the AutoConfig pipelines")
+    parser.add_argument("--devices", default="1,10,100,1000")
+    parser.add_argument(
+        "--pipelines",
+        default="v1,v2,v3,v3-batch,v3-pipeline,v3-server,v3-collect,v3-push",
+    )
+    parser.add_argument("--blades", type=int, default=2)
+    parser.add_argument("--ports-per-blade", type=int, default=48)
+    parser.add_argument("--vlans", type=int, default=4)
+    parser.add_argument("--descriptions", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--legacy-max", type=int, default=100)
+    parser.add_argument(
+        "--work-directory", default=os.path.join(tempfile.gettempdir(), "autoconfig")
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    arguments = parser.parse_args(argv)
+    arguments.devices = [int(count) for count in arguments.devices.split(",")]
+    arguments.pipelines = arguments.pipelines.split(",")
+    results = run(arguments)
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if arguments.compare:
+        with open(arguments.compare, "r") as previous_file:
+            compare(json.load(previous_file), results)
+
+
+if __name__ == "__main__":
+    main()